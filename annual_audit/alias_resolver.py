@@ -0,0 +1,99 @@
+import pandas as pd
+
+
+class AliasResolver:
+    """
+    科目别名解析器：由“科目等价映射”一次性编译而成，在整个运行期间
+    （各个Sheet、各个年度、各个单位）共用，不再每次查找都重新遍历映射表。
+
+    - resolve(name)     别名 -> 标准科目名，O(1)；不认识的名称原样返回
+    - aliases(standard) 标准科目名 -> 所有会解析到它的名称（含标准名本身），O(1)
+    - candidates(name)  名称所在等价组的全部名称，用于拿模板科目去匹配源数据行
+    """
+    __slots__ = ("alias_to_standard", "_aliases", "_groups", "_group_of")
+
+    def __init__(self, groups=()):
+        """
+        groups: 按映射表顺序给出的 (标准科目名, [等价科目名, ...])。
+        同一个别名出现在多个组时，alias_to_standard 以后出现的为准（与原先逐行写字典的结果一致），
+        candidates() 则以第一个命中的组为准（与原先“找到一组即返回”的结果一致）。
+        """
+        alias_to_standard = {}
+        groups_members = {}
+        group_of = {}
+        for standard, aliases in groups:
+            standard = str(standard).strip() if standard is not None else ""
+            if not standard:
+                continue
+            members = [standard] + [a for a in (str(x).strip() for x in aliases if x is not None) if a]
+            for name in members:
+                alias_to_standard[name] = standard
+                group_of.setdefault(name, standard)
+            groups_members.setdefault(standard, set()).update(members)
+
+        reverse = {}
+        for alias, standard in alias_to_standard.items():
+            reverse.setdefault(standard, set()).add(alias)
+
+        self.alias_to_standard = alias_to_standard
+        self._aliases = {std: frozenset(names) for std, names in reverse.items()}
+        self._groups = {std: frozenset(names) for std, names in groups_members.items()}
+        self._group_of = group_of
+
+    @classmethod
+    def from_dataframe(cls, alias_map_df: pd.DataFrame) -> "AliasResolver":
+        """从“科目等价映射”Sheet 读出的 DataFrame 编译（'等价科目名*' 列支持逗号分隔多个别名）。"""
+        if alias_map_df is None or alias_map_df.empty or '标准科目名' not in alias_map_df.columns:
+            return cls()
+        alias_cols = [col for col in alias_map_df.columns if '等价科目名' in str(col)]
+        groups = []
+        for row in alias_map_df[['标准科目名'] + alias_cols].itertuples(index=False):
+            standard, *cells = row
+            if pd.isna(standard):
+                continue
+            aliases = [alias for cell in cells if pd.notna(cell) for alias in str(cell).split(',')]
+            groups.append((standard, aliases))
+        return cls(groups)
+
+    @classmethod
+    def from_alias_map(cls, alias_map: dict) -> "AliasResolver":
+        """从 {标准科目名: [别名, ...]} 形式的字典编译。"""
+        groups = []
+        for standard, aliases in (alias_map or {}).items():
+            if not isinstance(aliases, (list, tuple, set)):
+                aliases = [aliases]
+            groups.append((standard, aliases))
+        return cls(groups)
+
+    def __len__(self) -> int:
+        return len(self.alias_to_standard)
+
+    def __contains__(self, name) -> bool:
+        return name is not None and str(name).strip() in self.alias_to_standard
+
+    def resolve(self, name):
+        """返回名称对应的标准科目名；不在映射中的名称去掉首尾空白后原样返回。"""
+        if name is None:
+            return None
+        key = str(name).strip()
+        return self.alias_to_standard.get(key, key)
+
+    def standard(self, name):
+        """与 resolve 相同，但不在映射中时返回 None。"""
+        if name is None:
+            return None
+        return self.alias_to_standard.get(str(name).strip())
+
+    def aliases(self, standard) -> frozenset:
+        """返回所有会解析到该标准科目名的名称（含标准名本身）；未登记时只返回它自己。"""
+        key = str(standard).strip()
+        return self._aliases.get(key, frozenset((key,)))
+
+    def candidates(self, name) -> set:
+        """返回名称所在等价组的全部名称（含名称本身），未登记时只返回它自己。"""
+        key = str(name).strip() if isinstance(name, str) else ""
+        candidates = {key}
+        standard = self._group_of.get(key)
+        if standard is not None:
+            candidates.update(self._groups[standard])
+        return candidates
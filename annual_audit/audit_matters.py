@@ -0,0 +1,119 @@
+"""
+“审计事项说明”表格（表二 ~ 表五）的构建。
+
+表格由 AUDIT_MATTERS_SPEC 描述（标题模板 + 表格类型 + 取数范围），
+同一类型的表格共用一个构建函数，新增一张同类表格只需在 spec 中加一行。
+
+build_audit_matters_tables 按 (单位, 年份) 分组一次性处理任意多个单位 / 年度：
+附注数据和事实表都需要带 单位、年份 两列，所有取数、合计和增减额都是整列运算，
+最后才按 (单位, 年份) 切分成各自的表格。单个单位时由 DataProcessor 补上这两列后调用。
+"""
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['单位', '年份']
+TOTAL_LABEL = '合    计'
+
+AUDIT_MATTERS_SPEC = [
+    {'标题': '二、{year}年12月31日的财务状况', '类型': '财务状况',
+     '资产': '资产总计', '负债': '负债合计', '非限定性': '非限定性净资产', '限定性': '限定性净资产'},
+    {'标题': '三、{year}年收入情况', '类型': '明细', '附注组名': '收入'},
+    {'标题': '四、{year}年费用开支情况', '类型': '明细', '项目': ['业务活动成本', '管理费用', '筹资费用', '其他费用']},
+    {'标题': '五、{year}年净资产构成及变化情况', '类型': '净资产变动', '项目': ['非限定性净资产', '限定性净资产']},
+]
+
+
+def _select_notes(notes: pd.DataFrame, table: dict) -> pd.DataFrame:
+    if '附注组名' in table:
+        return notes[notes['附注组名'] == table['附注组名']]
+    return notes[notes['项目'].isin(table['项目'])]
+
+
+def _split_with_totals(rows: pd.DataFrame, value_columns: list) -> dict:
+    """给每个 (单位, 年份) 的明细行追加一行合计，返回 {(单位, 年份): DataFrame}。"""
+    totals = rows.groupby(KEY_COLUMNS, sort=False)[value_columns].sum().reset_index()
+    totals.insert(len(KEY_COLUMNS), '项目', TOTAL_LABEL)
+    combined = pd.concat([rows.assign(_合计行=False), totals.assign(_合计行=True)], ignore_index=True)
+    combined = combined.sort_values('_合计行', kind='stable')
+    columns = ['项目'] + value_columns
+    return {
+        key: group[columns].reset_index(drop=True)
+        for key, group in combined.groupby(KEY_COLUMNS, sort=False)
+    }
+
+
+def _detail_tables(table, notes, facts) -> dict:
+    """明细表（收入、费用）：附注期末数全部计入非限定性，末行合计。"""
+    selected = _select_notes(notes, table)
+    rows = pd.DataFrame({
+        '单位': selected['单位'], '年份': selected['年份'], '项目': selected['项目'],
+        '非限定性': selected['期末数'], '限定性': 0.0, '合计': selected['期末数'],
+    })
+    return _split_with_totals(rows, ['非限定性', '限定性', '合计'])
+
+
+def _net_asset_change_tables(table, notes, facts) -> dict:
+    """净资产变动表：变动额为正计入本年增加，为负的绝对值计入本年减少。"""
+    selected = _select_notes(notes, table)
+    change = (selected['期末数'] - selected['期初数']).to_numpy()
+    rows = pd.DataFrame({
+        '单位': selected['单位'], '年份': selected['年份'], '项目': selected['项目'],
+        '年初余额': selected['期初数'],
+        '本年增加': np.where(change > 0, change, 0),
+        '本年减少': np.where(change < 0, -change, 0),
+        '年末余额': selected['期末数'],
+    })
+    return _split_with_totals(rows, ['年初余额', '本年增加', '本年减少', '年末余额'])
+
+
+def _financial_status_tables(table, notes, facts) -> dict:
+    """财务状况表：资产、负债总额取事实表中的期末总计（同名取第一条），净资产按性质取附注期末数之和。"""
+    totals_items = [table['资产'], table['负债']]
+    year_end = facts[(facts['期间'] == '期末') & facts['项目'].isin(totals_items)]
+    totals = year_end.drop_duplicates(KEY_COLUMNS + ['项目']).set_index(KEY_COLUMNS + ['项目'])['金额']
+    net_items = [table['非限定性'], table['限定性']]
+    net_assets = notes[notes['项目'].isin(net_items)].groupby(KEY_COLUMNS + ['项目'])['期末数'].sum()
+
+    tables = {}
+    for key in notes[KEY_COLUMNS].drop_duplicates().itertuples(index=False, name=None):
+        missing = [name for name in totals_items if key + (name,) not in totals.index]
+        if missing:
+            print(f"  ❌ 错误: {key[0]} {key[1]} 构建“财务状况表”失败，未能在数据中找到必要的总计项: {missing}")
+            continue
+        values = {name: totals[key + (name,)] for name in totals_items}
+        values.update({name: net_assets.get(key + (name,), 0) for name in net_items})
+        df_status = pd.DataFrame({
+            '项目': ['资产总额', '负债总额', '净资产总额'],
+            '非限定性': [values[table['资产']], values[table['负债']], values[table['非限定性']]],
+            '限定性': [0, 0, values[table['限定性']]],
+        }).fillna(0)
+        df_status['合计'] = df_status['非限定性'] + df_status['限定性']
+        tables[key] = df_status
+    return tables
+
+
+_BUILDERS = {
+    '财务状况': _financial_status_tables,
+    '明细': _detail_tables,
+    '净资产变动': _net_asset_change_tables,
+}
+
+
+def build_audit_matters_tables(notes: pd.DataFrame, facts: pd.DataFrame, spec: list = None) -> dict:
+    """
+    为 notes 中出现的每个 (单位, 年份) 生成审计事项说明表格。
+    :return: {(单位, 年份): {表格标题: DataFrame}}，各单位内的表格顺序与 spec 一致；
+             没有对应数据的表格不出现在结果中。
+    """
+    spec = AUDIT_MATTERS_SPEC if spec is None else spec
+    as_object = {name: object for name in KEY_COLUMNS}
+    notes = notes.astype(as_object)
+    facts = facts.astype(as_object)
+
+    keys = list(notes[KEY_COLUMNS].drop_duplicates().itertuples(index=False, name=None))
+    all_tables = {key: {} for key in keys}
+    for table in spec:
+        for key, df in _BUILDERS[table['类型']](table, notes, facts).items():
+            if key in all_tables:
+                all_tables[key][table['标题'].format(year=key[1])] = df
+    return all_tables
@@ -1,5 +1,7 @@
 import pandas as pd
 from typing import Dict, List
+from alias_resolver import AliasResolver
+from mapping_cache import load_compiled
 
 class ConfigLoader:
     """
@@ -12,29 +14,26 @@ class ConfigLoader:
         "业务活动表逐行",
         "科目等价映射",
         "inj1",
-        "text_mapping"
+        "text_mapping",
+        "复核规则"
     ]
 
     def __init__(self, mapping_filepath: str):
         self.filepath = mapping_filepath
         self.configs: Dict[str, pd.DataFrame] = {}
+        self.alias_resolver = AliasResolver()
         print(f"初始化配置加载器，目标文件: {self.filepath}")
 
     def load_all_sheets(self) -> bool:
         """
         加载所有定义的Sheet页到 self.configs 字典中。
+        mapping 文件内容未变化时直接使用编译缓存，不再重新解析 xlsx。
         """
         try:
             print("开始加载 mapping_file.xlsx...")
-            with pd.ExcelFile(self.filepath) as xls:
-                # 循环加载所有定义的Sheet页
-                for sheet_name in self.SHEET_NAMES:
-                    if sheet_name in xls.sheet_names:
-                        self.configs[sheet_name] = pd.read_excel(xls, sheet_name=sheet_name)
-                        print(f"  ✅ 成功加载Sheet页: '{sheet_name}'")
-                    else:
-                        print(f"  ⚠️ 信息：在文件中未找到可选的Sheet页: '{sheet_name}'，已跳过。")
-            
+            compiled = load_compiled(self.filepath, self._parse_all_sheets, name="configs")
+            self.configs = dict(compiled["configs"])
+            self.alias_resolver = compiled["alias_resolver"]
             print("所有可用的配置Sheet页已加载。")
             return True
 
@@ -45,6 +44,22 @@ class ConfigLoader:
             print(f"❌ 错误：在加载配置文件时发生未知错误: {e}")
             return False
 
+    def _parse_all_sheets(self, filepath: str) -> dict:
+        """真正解析 xlsx 的部分，只在编译缓存未命中时调用。"""
+        configs = {}
+        with pd.ExcelFile(filepath) as xls:
+            # 循环加载所有定义的Sheet页
+            for sheet_name in self.SHEET_NAMES:
+                if sheet_name in xls.sheet_names:
+                    configs[sheet_name] = pd.read_excel(xls, sheet_name=sheet_name)
+                    print(f"  ✅ 成功加载Sheet页: '{sheet_name}'")
+                else:
+                    print(f"  ⚠️ 信息：在文件中未找到可选的Sheet页: '{sheet_name}'，已跳过。")
+
+        # 科目别名也在这里编译一次，随配置一起缓存，后续所有查找直接复用
+        alias_resolver = AliasResolver.from_dataframe(configs.get("科目等价映射", pd.DataFrame()))
+        return {"configs": configs, "alias_resolver": alias_resolver}
+
     def get_config_df(self, sheet_name: str) -> pd.DataFrame:
         """
         提供一个安全的接口来获取已加载的配置DataFrame。
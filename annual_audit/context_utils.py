@@ -1,4 +1,3 @@
-
 import pandas as pd
 import os
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -9,28 +8,56 @@ def fmt(val):
     except:
         return "0.00"
 
+def load_clean_df(path):
+    df = pd.read_excel(path)
+    df.columns = df.columns.str.strip()
+    df.iloc[:, 0] = df.iloc[:, 0].astype(str).str.strip()
+    return df
+
+def normalize_mapping(map_df):
+    """清洗 mapping 的 column / project_name / source_sheet 三列（原地修改并返回）。"""
+    map_df['column'] = map_df['column'].fillna('本年累计数_合计').astype(str).str.strip()
+    map_df['project_name'] = map_df['project_name'].astype(str).str.strip()
+    map_df['source_sheet'] = map_df['source_sheet'].astype(str).str.strip()
+    return map_df
+
+_LOOKUP_KEYS = ['source_sheet', 'project_name', 'column']
+
+def _statement_values(sheet, df):
+    """
+    把一张报表按项目名称展开成 (source_sheet, project_name, column, value) 长表。
+    同名项目只保留第一行，与按名称筛选后取第一行一致；转为 object 后展开，各列的数值类型保持不变。
+    """
+    rows = df.drop_duplicates(subset=df.columns[0], keep='first').astype(object)
+    rows.index = pd.Index(rows.iloc[:, 0], name='project_name')
+    long = rows.melt(var_name='column', value_name='value', ignore_index=False).reset_index()
+    long.insert(0, 'source_sheet', sheet)
+    return long
+
+def lookup_values(activity_df, balance_df, map_df) -> dict:
+    """
+    按 mapping 取数：{(source_sheet, project_name): 值}，找不到的为 None。map_df 需已 normalize_mapping。
+    两张报表各展开一次，mapping 与之按 (报表, 项目, 列) 做一次左连接，不再逐行筛选整张报表。
+    """
+    statements = pd.concat(
+        [_statement_values("业务活动表", activity_df), _statement_values("资产负债表", balance_df)],
+        ignore_index=True,
+    ).drop_duplicates(subset=_LOOKUP_KEYS, keep='first')
+    resolved = map_df[_LOOKUP_KEYS].astype(object).merge(statements, on=_LOOKUP_KEYS, how='left', indicator=True)
+    found = resolved['_merge'] == 'both'
+    return {
+        (sheet, item): (val if hit else None)
+        for sheet, item, val, hit in zip(resolved['source_sheet'], resolved['project_name'], resolved['value'], found)
+    }
+
 def build_context_and_values(activity_df, balance_df, map_df):
     """
     根据三张数据表生成：
     1. context 字典（供 docxtpl 渲染使用）
     2. values 字典（原始数据，供附注表格/描述使用）
     """
-    map_df['column'] = map_df['column'].fillna('本年累计数_合计').astype(str).str.strip()
-    map_df['project_name'] = map_df['project_name'].astype(str).str.strip()
-    map_df['source_sheet'] = map_df['source_sheet'].astype(str).str.strip()
-
-    values = {}
-    for _, row in map_df.iterrows():
-        sheet = row['source_sheet']
-        item  = row['project_name']
-        col   = row['column']
-        df = activity_df if sheet == "业务活动表" else balance_df if sheet == "资产负债表" else None
-        if df is not None:
-            m = df[df.iloc[:,0] == item]
-            val = m.iloc[0][col] if (not m.empty and col in df.columns) else None
-        else:
-            val = None
-        values[(sheet, item)] = val
+    normalize_mapping(map_df)
+    values = lookup_values(activity_df, balance_df, map_df)
 
     context = {}
     for _, row in map_df.iterrows():
@@ -38,3 +65,30 @@ def build_context_and_values(activity_df, balance_df, map_df):
         context[key] = fmt(values.get((row['source_sheet'], row['project_name']), 0))
 
     return context, values
+
+def build_report_context(activity_file, balance_file, mapping_file, task_file) -> dict:
+    """
+    两份 Word 报告（审计事项说明、报表附注）共用的上下文构建阶段：每个输入文件只读取一次。
+    返回：
+      context     渲染用的上下文（mapping 取到的原始数值，task 第一行的信息覆盖同名键）
+      values      {(source_sheet, project_name): 值}
+      activity_df / balance_df / combined_df  清洗后的业务活动表、资产负债表及二者的纵向拼接
+    结果只包含 DataFrame 和基本类型，可以直接交给子进程渲染。
+    """
+    activity_df = load_clean_df(activity_file)
+    balance_df = load_clean_df(balance_file)
+    map_df = normalize_mapping(pd.read_excel(mapping_file))
+    values = lookup_values(activity_df, balance_df, map_df)
+
+    context = {row['context_key']: values.get((row['source_sheet'], row['project_name']), None) for _, row in map_df.iterrows()}
+    task_df = pd.read_excel(task_file)
+    if not task_df.empty:
+        context.update(task_df.iloc[0].dropna().to_dict())
+
+    return {
+        "context": context,
+        "values": values,
+        "activity_df": activity_df,
+        "balance_df": balance_df,
+        "combined_df": pd.concat([balance_df, activity_df], axis=0, ignore_index=True),
+    }
@@ -1,20 +1,52 @@
+import os
 import pandas as pd
 import re
-from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
+from workbook_session import WorkbookSession
+from alias_resolver import AliasResolver
+from fact_table import FactTableBuilder
+from keyword_matcher import KeywordMatcher
+from label_utils import strip_ordinal_prefix
+from verification_rules import load_rules, run_rules
+from audit_matters import build_audit_matters_tables
+
+# 业务活动表中需要动态定位行号的费用类科目
+_EXPENSE_KEYWORDS = KeywordMatcher(('费用', '成本'))
+
 
 class DataProcessor:
     """
     【最终版本】核心数据处理器：使用openpyxl进行精确数据提取，再交由pandas进行处理。
     """
-    def __init__(self, source_filepath: str, configs_dict: dict):
+    def __init__(self, source_filepath: str, configs_dict: dict, session: WorkbookSession = None,
+                 alias_resolver: AliasResolver = None):
         self.source_filepath = source_filepath
         self.configs = configs_dict
+        # 科目别名解析器：优先复用 ConfigLoader 已编译好的，没有时才从配置现编译一次
+        self.alias_resolver = alias_resolver if alias_resolver is not None else \
+            AliasResolver.from_dataframe(configs_dict.get('科目等价映射', pd.DataFrame()))
+        # 所有解析函数共用同一个工作簿会话，源文件每次运行只解析一次
+        self._owns_session = session is None
+        self.session = session if session is not None else WorkbookSession(source_filepath)
         self.raw_extracted_data = []
         self.processed_data = {}
         self.verification_totals = {}
+        self._audit_year = None
+        self._audit_year_extracted = False
         print("初始化数据处理器 (最终版本)。")
 
+    def close(self):
+        """关闭由本处理器自行创建的工作簿会话（外部传入的会话由调用方负责关闭）。"""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
     def _get_column_index(self, col_str: str) -> int:
         return column_index_from_string(str(col_str))
     
@@ -25,77 +57,54 @@ class DataProcessor:
         """
         print("  正在专门提取用于复核的总计值...")
         try:
-            wb = load_workbook(self.source_filepath, data_only=True)
-            alias_map_df = self.configs.get('科目等价映射', pd.DataFrame())
             bs_map = self.configs.get('资产负债表区块', pd.DataFrame())
             act_map = self.configs.get('业务活动表逐行', pd.DataFrame())
 
-            # 1. 创建别名 -> 标准名的反向映射字典
-            alias_to_standard_map = {}
-            if not alias_map_df.empty:
-                for _, row in alias_map_df.iterrows():
-                    standard_name = row['标准科目名']
-                    # 确保标准名本身也作为自己的“别名”
-                    alias_to_standard_map[standard_name] = standard_name
-                    for col in alias_map_df.columns:
-                        if '等价科目名' in col and pd.notna(row[col]):
-                            aliases = [alias.strip() for alias in str(row[col]).split(',')]
-                            for alias in aliases:
-                                if alias: alias_to_standard_map[alias] = standard_name
+            # 1. 别名 -> 标准名的映射由 AliasResolver 统一提供（标准名本身也算作自己的“别名”）
 
             # 2. 定义我们需要查找的所有总计项的“指令清单”
             target_totals_config = {
-                '净资产合计': ['期初净资产', '期末净资产', bs_map, '区块名称', wb['资产负债表']],
-                '收入合计': ['收入合计', None, act_map, '字段名', wb['业务活动表']],
-                '费用合计': ['费用合计', None, act_map, '字段名', wb['业务活动表']],
+                '净资产合计': ['期初净资产', '期末净资产', bs_map, '区块名称', self.session.grid('资产负债表')],
+                '收入合计': ['收入合计', None, act_map, '字段名', self.session.grid('业务活动表')],
+                '费用合计': ['费用合计', None, act_map, '字段名', self.session.grid('业务活动表')],
             }
 
             # 3. 遍历“指令清单”，统一处理每一个要查找的项目
             for std_name, config in target_totals_config.items():
                 start_key, end_key, map_df, map_item_col, sheet = config
                 
-                aliases_to_find = [alias for alias, std in alias_to_standard_map.items() if std == std_name]
-                if not aliases_to_find: aliases_to_find.append(std_name)
+                aliases_to_find = self.alias_resolver.aliases(std_name)
+
+                # 在前60行的标签列上建索引（资产负债表同时索引A、E两栏），按别名直接命中
+                label_columns = (1, 5) if sheet.title == '资产负债表' else (1,)
+                label_index = sheet.label_index(columns=label_columns, max_row=60)
+                hit = label_index.first(aliases_to_find)
 
                 found = False
-                for row_idx in range(1, 61):
-                    cells_to_check = [sheet.cell(row=row_idx, column=1)]
-                    if sheet.title == '资产负债表':
-                        cells_to_check.append(sheet.cell(row=row_idx, column=5))
-
-                    for cell in cells_to_check:
-                        if not cell.value: continue
-                        cell_text_clean = str(cell.value).strip()
-
-                        for alias in aliases_to_find:
-                            if alias == cell_text_clean:
-                                print(f"    -> 在 '{sheet.title}' 第 {cell.row} 行根据别名 '{alias}' 命中 '{std_name}'")
-                                
-                                config_row = map_df[map_df[map_item_col] == std_name]
-                                if config_row.empty:
-                                    print(f"      ⚠️ 警告: 在mapping文件中找不到标准名 '{std_name}' 的配置。")
-                                    continue
-
-                                if sheet.title == '资产负债表':
-                                    start_col = config_row['期初列'].iloc[0]
-                                    end_col = config_row['期末列'].iloc[0]
-                                    start_val = sheet.cell(row=cell.row, column=self._get_column_index(start_col)).value
-                                    end_val = sheet.cell(row=cell.row, column=self._get_column_index(end_col)).value
-                                    
-                                    self.verification_totals[start_key] = pd.to_numeric(start_val, errors='coerce')
-                                    if end_key: self.verification_totals[end_key] = pd.to_numeric(end_val, errors='coerce')
-                                    print(f"      -> 已提取: {start_key}={self.verification_totals.get(start_key, 'N/A')}, {end_key}={self.verification_totals.get(end_key, 'N/A')}")
-                                else:
-                                    end_col = config_row['期末合计列'].iloc[0]
-                                    end_val = sheet.cell(row=cell.row, column=self._get_column_index(end_col)).value
-                                    self.verification_totals[start_key] = pd.to_numeric(end_val, errors='coerce')
-                                    print(f"      -> 已提取: {start_key}={self.verification_totals.get(start_key, 'N/A')}")
-                                
-                                found = True
-                                break
-                        if found: break
-                    if found: break
-                
+                if hit:
+                    row_idx, col_idx = hit
+                    print(f"    -> 在 '{sheet.title}' 第 {row_idx} 行根据别名 '{sheet.value(row_idx, col_idx)}' 命中 '{std_name}'")
+
+                    config_row = map_df[map_df[map_item_col] == std_name]
+                    if config_row.empty:
+                        print(f"      ⚠️ 警告: 在mapping文件中找不到标准名 '{std_name}' 的配置。")
+                    elif sheet.title == '资产负债表':
+                        start_col = config_row['期初列'].iloc[0]
+                        end_col = config_row['期末列'].iloc[0]
+                        start_val = sheet.value(row_idx, self._get_column_index(start_col))
+                        end_val = sheet.value(row_idx, self._get_column_index(end_col))
+
+                        self.verification_totals[start_key] = pd.to_numeric(start_val, errors='coerce')
+                        if end_key: self.verification_totals[end_key] = pd.to_numeric(end_val, errors='coerce')
+                        print(f"      -> 已提取: {start_key}={self.verification_totals.get(start_key, 'N/A')}, {end_key}={self.verification_totals.get(end_key, 'N/A')}")
+                        found = True
+                    else:
+                        end_col = config_row['期末合计列'].iloc[0]
+                        end_val = sheet.value(row_idx, self._get_column_index(end_col))
+                        self.verification_totals[start_key] = pd.to_numeric(end_val, errors='coerce')
+                        print(f"      -> 已提取: {start_key}={self.verification_totals.get(start_key, 'N/A')}")
+                        found = True
+
                 if not found:
                     print(f"  ⚠️ 警告: 未能在文件中找到任何与 '{std_name}' 匹配的合计项。")
 
@@ -108,8 +117,7 @@ class DataProcessor:
     def _parse_balance_sheet(self):
         # 此函数的内部逻辑保持不变
         print("  正在解析'资产负债表'...")
-        wb = load_workbook(self.source_filepath, data_only=True)
-        sheet = wb['资产负债表']
+        sheet = self.session.grid('资产负债表')
         bs_map = self.configs.get('资产负债表区块', pd.DataFrame())
         if bs_map.empty: return
 
@@ -119,18 +127,18 @@ class DataProcessor:
             item_col_idx = self._get_column_index(re.search(r'[A-Z]+', start_cell).group())
             start_val_col_idx, end_val_col_idx = self._get_column_index(row_map['期初列']), self._get_column_index(row_map['期末列'])
             
-            skip_keywords = str(row_map['跳过行']).split(',') if pd.notna(row_map['跳过行']) else []
+            skip_matcher = KeywordMatcher.of(str(row_map['跳过行']).split(',') if pd.notna(row_map['跳过行']) else ())
             group_name = row_map.get('附注组名')
             is_note_item = row_map.get('是否为附注科目') == '是'
 
             for row_idx in range(start_row, end_row + 1):
-                item_name = sheet.cell(row=row_idx, column=item_col_idx).value
+                item_name = sheet.value(row_idx, item_col_idx)
                 if not item_name or not isinstance(item_name, str) or item_name.isspace(): continue
                 item_name = item_name.strip()
-                if any(keyword in item_name for keyword in skip_keywords if keyword): continue
+                if skip_matcher.search(item_name): continue
 
-                start_val = sheet.cell(row=row_idx, column=start_val_col_idx).value
-                end_val = sheet.cell(row=row_idx, column=end_val_col_idx).value
+                start_val = sheet.value(row_idx, start_val_col_idx)
+                end_val = sheet.value(row_idx, end_val_col_idx)
                 
                 if item_name:
                     self.raw_extracted_data.append({
@@ -144,13 +152,18 @@ class DataProcessor:
     def _parse_activity_sheet(self):
         # 此函数的内部逻辑保持不变
         print("  正在解析'业务活动表'...")
-        wb = load_workbook(self.source_filepath, data_only=True)
-        sheet = wb['业务活动表']
+        sheet = self.session.grid('业务活动表')
         act_map = self.configs.get('业务活动表逐行', pd.DataFrame())
         if act_map.empty: return
 
         all_items_map = act_map.to_dict('records')
         row_offset = 0
+        # 费用类科目在第10-50行动态定位，统一用一次建好的标签索引查找
+        expense_index = sheet.label_index(min_row=10, max_row=50)
+        expense_hits = expense_index.find_many(
+            str(row_map['字段名']).strip() for row_map in all_items_map
+            if pd.isna(row_map['行号']) and _EXPENSE_KEYWORDS.search(str(row_map['字段名']).strip())
+        )
 
         for row_map in all_items_map:
             item_name_map = str(row_map['字段名']).strip()
@@ -162,39 +175,36 @@ class DataProcessor:
                 is_income = '收入' in str(group_name)
                 
                 if "商品销售收入" in item_name_map:
-                    actual_item_name = sheet.cell(row=row_num_map, column=1).value
+                    actual_item_name = sheet.value(row_num_map, 1)
                     if actual_item_name and item_name_map in str(actual_item_name):
-                        end_val_cell = sheet.cell(row=row_num_map, column=self._get_column_index(row_map['期末合计列']))
-                        if pd.notna(end_val_cell.value) and float(end_val_cell.value) != 0:
+                        end_val = sheet.value(row_num_map, self._get_column_index(row_map['期末合计列']))
+                        if pd.notna(end_val) and float(end_val) != 0:
                             row_offset = 1
                 
                 target_row = row_num_map + (row_offset if is_income else 0)
-                actual_item_name_check = sheet.cell(row=target_row, column=1).value
+                actual_item_name_check = sheet.value(target_row, 1)
                 actual_clean = str(actual_item_name_check).strip().replace('　', '')
 
                 if actual_item_name_check and item_name_map == actual_clean:
-                    start_val = sheet.cell(row=target_row, column=self._get_column_index(row_map['期初合计列'])).value
-                    end_val = sheet.cell(row=target_row, column=self._get_column_index(row_map['期末合计列'])).value
+                    start_val = sheet.value(target_row, self._get_column_index(row_map['期初合计列']))
+                    end_val = sheet.value(target_row, self._get_column_index(row_map['期末合计列']))
                     self.raw_extracted_data.append({
                         "项目": item_name_map, "期初数": start_val, "期末数": end_val,
                         "来源表": "业务活动表", "附注组名": group_name if pd.notna(group_name) else item_name_map,
                         "是否为附注科目": is_note_item
                     })
             else:
-                if '费用' in item_name_map or '成本' in item_name_map:
-                    found = False
-                    for row in sheet.iter_rows(min_row=10, max_row=50, min_col=1, max_col=1):
-                        cell = row[0]
-                        if cell.value and item_name_map in str(cell.value):
-                            start_val = sheet.cell(row=cell.row, column=self._get_column_index(row_map['期初合计列'])).value
-                            end_val = sheet.cell(row=cell.row, column=self._get_column_index(row_map['期末合计列'])).value
-                            self.raw_extracted_data.append({
-                                "项目": item_name_map, "期初数": start_val, "期末数": end_val,
-                                "来源表": "业务活动表", "附注组名": group_name if pd.notna(group_name) else item_name_map,
-                                "是否为附注科目": is_note_item
-                            })
-                            found = True
-                            break
+                if _EXPENSE_KEYWORDS.search(item_name_map):
+                    hit = expense_hits.get(item_name_map)
+                    if hit:
+                        row_idx = hit[0]
+                        start_val = sheet.value(row_idx, self._get_column_index(row_map['期初合计列']))
+                        end_val = sheet.value(row_idx, self._get_column_index(row_map['期末合计列']))
+                        self.raw_extracted_data.append({
+                            "项目": item_name_map, "期初数": start_val, "期末数": end_val,
+                            "来源表": "业务活动表", "附注组名": group_name if pd.notna(group_name) else item_name_map,
+                            "是否为附注科目": is_note_item
+                        })
         print("  '业务活动表'解析完成。")  
 
     def get_notes_data(self) -> pd.DataFrame:
@@ -205,6 +215,7 @@ class DataProcessor:
         
         # 1. 确保已提取了所有原始数据
         self.raw_extracted_data = []
+        self.processed_data.pop('fact_table', None)
         self._extract_verification_totals()
         self._parse_balance_sheet()
         self._parse_activity_sheet()
@@ -238,15 +249,41 @@ class DataProcessor:
         final_df = pd.concat([bs_items_df, net_asset_df, act_items_df], ignore_index=True)
 
         # 5. 清理项目名称和组名中的序号前缀
-        final_df['项目'] = final_df['项目'].apply(lambda x: re.sub(r'^[（\(][一二三四五六七八九十\d]+[）\)]\s*', '', str(x)).strip())
-        final_df['附注组名'] = final_df['附注组名'].apply(lambda x: re.sub(r'^[（\(][一二三四五六七八九十\d]+[）\)]\s*', '', str(x)).strip())
+        final_df['项目'] = final_df['项目'].map(strip_ordinal_prefix)
+        final_df['附注组名'] = final_df['附注组名'].map(strip_ordinal_prefix)
         
         final_df.reset_index(drop=True, inplace=True)
         self.processed_data['notes_data'] = final_df
         return final_df
     
+    def get_fact_table(self, entity: str = None) -> pd.DataFrame:
+        """
+        把已提取的原始数据转换为统一的长格式事实表（见 fact_table.py），供下游按编码向量化筛选。
+        年份为审计年度；资产负债表取 期初/期末，业务活动表的上年/本年列记为 上期/本期。
+        需在 get_notes_data() 之后调用；结果缓存，重新提取后自动失效。
+        """
+        facts = self.processed_data.get('fact_table')
+        if facts is not None:
+            return facts
+
+        audit_year = self.extract_audit_year()
+        year = str(audit_year) if audit_year else "未知"
+        periods = {"资产负债表": ("期初", "期末"), "业务活动表": ("上期", "本期")}
+        builder = FactTableBuilder()
+        for record in self.raw_extracted_data:
+            item, statement = record["项目"], record["来源表"]
+            item_type = '合计' if ('合计' in item or '总计' in item) else '普通'
+            start_period, end_period = periods[statement]
+            builder.add(statement, statement, year, item, item_type, start_period, record["期初数"])
+            builder.add(statement, statement, year, item, item_type, end_period, record["期末数"])
+
+        if entity is None:
+            entity = os.path.splitext(os.path.basename(self.source_filepath))[0]
+        facts = self.processed_data['fact_table'] = builder.to_frame(entity)
+        return facts
+
     def run_verification_checks(self) -> list:
-        # 此函数保持不变
+        """按复核规则（mapping 的“复核规则”Sheet，缺省时为内置规则）核对附注数据与报表总计。"""
         print("--- 开始执行数据复核 ---")
         results = []
         notes_df = self.processed_data.get('notes_data', pd.DataFrame())
@@ -254,56 +291,38 @@ class DataProcessor:
             results.append("未提取到有效数据，无法执行复核。")
             return results
 
-        income_group_name = '收入'
-        calc_income_total = notes_df[notes_df['附注组名'] == income_group_name]['期末数'].sum()
-        report_income_total = self.verification_totals.get('收入合计', 0)
-        if abs(calc_income_total - report_income_total) < 1e-6:
-            results.append(f"✅ 收入内部核对成功: 计算值 {calc_income_total:,.2f} vs 报表值 {report_income_total:,.2f}")
-        else:
-            diff = calc_income_total - report_income_total
-            results.append(f"❌ 收入内部核对失败: 计算值 {calc_income_total:,.2f} vs 报表值 {report_income_total:,.2f} (差额: {diff:,.2f})")
-
-        expense_items = ['业务活动成本', '管理费用', '筹资费用', '其他费用']
-        calc_expense_total = notes_df[notes_df['项目'].isin(expense_items)]['期末数'].sum()
-        report_expense_total = self.verification_totals.get('费用合计', 0)
-        if abs(calc_expense_total - report_expense_total) < 1e-6:
-            results.append(f"✅ 支出内部核对成功: 计算值 {calc_expense_total:,.2f} vs 报表值 {report_expense_total:,.2f}")
-        else:
-            diff = calc_expense_total - report_expense_total
-            results.append(f"❌ 支出内部核对失败: 计算值 {calc_expense_total:,.2f} vs 报表值 {report_expense_total:,.2f} (差额: {diff:,.2f})")
-
-        income_minus_expense = report_income_total - report_expense_total
-        net_asset_change = self.verification_totals.get('期末净资产', 0) - self.verification_totals.get('期初净资产', 0)
-        if abs(income_minus_expense - net_asset_change) < 1e-6:
-            results.append(f"✅ 收支与净资产联动核对成功: 收支差额 {income_minus_expense:,.2f} vs 净资产变动 {net_asset_change:,.2f}")
-        else:
-            diff = income_minus_expense - net_asset_change
-            results.append(f"❌ 收支与净资产联动核对失败: 收支差额 {income_minus_expense:,.2f} vs 净资产变动 {net_asset_change:,.2f} (差额: {diff:,.2f})")
-        
+        rules = load_rules(self.configs.get('复核规则'))
+        results.extend(run_rules(rules, notes_df, self.verification_totals))
+
         print("--- 复核结束 ---")
         return results
     
     def extract_audit_year(self) -> int | None:
-        # 此函数保持不变
+        """提取审计年度。结果在首次提取后缓存，重复调用不会再读取工作簿。"""
+        if not self._audit_year_extracted:
+            self._audit_year = self._read_audit_year()
+            self._audit_year_extracted = True
+        return self._audit_year
+
+    def _read_audit_year(self) -> int | None:
         print("正在自动提取审计年度...")
         try:
-            wb = load_workbook(self.source_filepath, data_only=True)
-            bs_sheet, act_sheet = wb['资产负债表'], wb['业务活动表']
+            bs_sheet, act_sheet = self.session.grid('资产负债表'), self.session.grid('业务活动表')
             pattern_date = re.compile(r'(\d{4})年12月31日')
             pattern_year = re.compile(r'(\d{4})年度')
             bs_year, act_year = None, None
             
-            for cell in bs_sheet[3]:
-                if cell.value:
-                    if isinstance(cell.value, str):
-                        match = pattern_date.search(cell.value)
+            for value in bs_sheet.row(3):
+                if value:
+                    if isinstance(value, str):
+                        match = pattern_date.search(value)
                         if match: bs_year = int(match.group(1)); break
-                    elif hasattr(cell.value, 'year'):
-                        bs_year = cell.value.year; break
+                    elif hasattr(value, 'year'):
+                        bs_year = value.year; break
             
-            for cell in act_sheet[3]:
-                if cell.value and isinstance(cell.value, str):
-                    match = pattern_year.search(cell.value)
+            for value in act_sheet.row(3):
+                if value and isinstance(value, str):
+                    match = pattern_year.search(value)
                     if match: act_year = int(match.group(1)); break
 
             if bs_year and act_year and bs_year == act_year:
@@ -319,92 +338,25 @@ class DataProcessor:
     def get_audit_matters_tables(self) -> dict:
         """
         根据已处理好的数据，生成“审计事项说明”所需的四张核心表格的DataFrame。
+        表格的定义见 audit_matters.AUDIT_MATTERS_SPEC；多个单位 / 年度可直接调用 build_audit_matters_tables。
         :return: 一个以表格标题为键，DataFrame为值的字典。
         """
         print("正在生成“审计事项说明”的表格数据...")
         
-        # 1. 准备所需的基础数据
+        # 1. 准备所需的基础数据：附注数据 + 事实表（总计项从事实表中查找，更加可靠）
         notes_df = self.processed_data.get('notes_data', pd.DataFrame())
-        # 从主数据表中查找总计项，更加可靠
-        all_totals_df = pd.DataFrame(self.raw_extracted_data)
+        facts = self.get_fact_table()
         audit_year = self.extract_audit_year()
 
-        if notes_df.empty or all_totals_df.empty or not audit_year:
+        if notes_df.empty or facts.empty or not audit_year:
             print("  ⚠️ 警告: 缺少基础数据(notes_df/all_totals_df/year)，无法生成审计事项说明。")
             return {}
 
-        all_tables = {}
-        # --- 表二：财务状况 ---
-        print(f"  -> 构建表二：{audit_year}年12月31日的财务状况")
-        try:
-            # 直接从原始提取数据中查找总计行
-            asset_total = pd.to_numeric(all_totals_df.loc[all_totals_df['项目'] == '资产总计', '期末数'].iloc[0], errors='coerce')
-            liability_total = pd.to_numeric(all_totals_df.loc[all_totals_df['项目'] == '负债合计', '期末数'].iloc[0], errors='coerce')            
-            # 从处理后的附注数据中获取净资产明细
-            non_limited_net_asset = notes_df.loc[notes_df['项目'] == '非限定性净资产', '期末数'].sum()
-            limited_net_asset = notes_df.loc[notes_df['项目'] == '限定性净资产', '期末数'].sum()
-
-            financial_status_data = {
-                '项目': ['资产总额', '负债总额', '净资产总额'],
-                '非限定性': [asset_total, liability_total, non_limited_net_asset],
-                '限定性': [0, 0, limited_net_asset]
-            }
-            df_status = pd.DataFrame(financial_status_data).fillna(0)
-            df_status['合计'] = df_status['非限定性'] + df_status['限定性']
-            all_tables[f"二、{audit_year}年12月31日的财务状况"] = df_status
-        except (IndexError, KeyError) as e:
-            print(f"  ❌ 错误: 构建“财务状况表”失败，未能在数据中找到必要的总计项。错误: {e}")
-
-        # --- 表三 & 表四：收入与费用情况 ---
-        print(f"  -> 构建表三与表四：{audit_year}年收入与费用情况")        
-        # 收入表
-        income_df = notes_df[notes_df['附注组名'] == '收入'].copy()
-        if not income_df.empty:
-            df_income_details = income_df[['项目', '期末数']].rename(columns={'期末数': '合计'})
-            # 此处假设所有收入明细都计入“非限定性”，您可以根据未来的需求调整
-            df_income_details['非限定性'] = df_income_details['合计']
-            df_income_details['限定性'] = 0.0
-            df_income_details = df_income_details[['项目', '非限定性', '限定性', '合计']]
-            
-            income_total_row = pd.DataFrame([{'项目': '合    计', 
-                                            '非限定性': df_income_details['非限定性'].sum(),
-                                            '限定性': df_income_details['限定性'].sum(),
-                                            '合计': df_income_details['合计'].sum()}])
-            all_tables[f"三、{audit_year}年收入情况"] = pd.concat([df_income_details, income_total_row], ignore_index=True)
-
-        # 费用表
-        expense_items = ['业务活动成本', '管理费用', '筹资费用', '其他费用']
-        expense_df = notes_df[notes_df['项目'].isin(expense_items)].copy()
-        if not expense_df.empty:
-            df_expense_details = expense_df[['项目', '期末数']].rename(columns={'期末数': '合计'})
-            df_expense_details['非限定性'] = df_expense_details['合计']
-            df_expense_details['限定性'] = 0.0
-            df_expense_details = df_expense_details[['项目', '非限定性', '限定性', '合计']]
-
-            expense_total_row = pd.DataFrame([{'项目': '合    计', 
-                                            '非限定性': df_expense_details['非限定性'].sum(),
-                                            '限定性': df_expense_details['限定性'].sum(),
-                                            '合计': df_expense_details['合计'].sum()}])
-            all_tables[f"四、{audit_year}年费用开支情况"] = pd.concat([df_expense_details, expense_total_row], ignore_index=True)
-
-        # --- 表五：净资产构成及变化情况 ---
-        print(f"  -> 构建表五：{audit_year}年净资产构成及变化情况")
-        net_asset_items = ['非限定性净资产', '限定性净资产']
-        net_asset_df = notes_df[notes_df['项目'].isin(net_asset_items)].copy()
-        if not net_asset_df.empty:
-            net_asset_df['变动额'] = net_asset_df['期末数'] - net_asset_df['期初数']
-            net_asset_df['本年增加'] = net_asset_df['变动额'].apply(lambda x: x if x > 0 else 0)
-            net_asset_df['本年减少'] = net_asset_df['变动额'].apply(lambda x: abs(x) if x < 0 else 0)
-            
-            df_net_asset_change = net_asset_df[['项目', '期初数', '本年增加', '本年减少', '期末数']].rename(columns={'期初数':'年初余额', '期末数':'年末余额'})
-            
-            total_row = pd.DataFrame([{'项目': '合    计',
-                                     '年初余额': df_net_asset_change['年初余额'].sum(),
-                                     '本年增加': df_net_asset_change['本年增加'].sum(),
-                                     '本年减少': df_net_asset_change['本年减少'].sum(),
-                                     '年末余额': df_net_asset_change['年末余额'].sum()}])
-            
-            all_tables[f"五、{audit_year}年净资产构成及变化情况"] = pd.concat([df_net_asset_change, total_row], ignore_index=True)
+        # 2. 附注数据补上与事实表一致的 单位 / 年份 两列，所有表格一次构建
+        key = (facts['单位'].iloc[0], str(audit_year))
+        print(f"  -> 构建表二至表五：{audit_year}年财务状况、收入、费用与净资产变化情况")
+        notes = notes_df.assign(单位=key[0], 年份=key[1])
+        all_tables = build_audit_matters_tables(notes, facts).get(key, {})
 
         print("✅ “审计事项说明”表格数据生成完毕。")
         return all_tables
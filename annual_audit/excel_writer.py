@@ -1,14 +1,102 @@
 import pandas as pd
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
 from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+
+# 中日韩统一表意文字（\u4e00-\u9fff）的删除表：删掉后少了几个字符，就有几个按2计宽的汉字
+_CJK_DELETE_TABLE = dict.fromkeys(range(0x4e00, 0x9fff + 1))
+
+
+def display_width(value) -> int:
+    """单元格内容的显示宽度：中文字符按2计，其余按1计；空值为0。"""
+    if not value:
+        return 0
+    text = str(value)
+    return 2 * len(text) - len(text.translate(_CJK_DELETE_TABLE))
+
+
+class _SheetBuffer:
+    """
+    一个Sheet页的“行计划”：{行号: {列号: (值, 样式名)}}。
+    只保存值和样式名，不创建任何 Cell 对象，保存时按行号顺序一次性流式写出。
+    每次 put 时顺带更新该列的最大显示宽度，写完即可直接得到列宽，不必再回头扫描整张表
+    （write_only 模式下列宽必须在写第一行之前设好）。
+
+    width_start_rows: {列号: 起算行号}，该列在起算行之前的内容不计入列宽（例如跨列显示的引言）。
+    同一单元格只写一次，不支持覆盖后回退列宽。
+    """
+    __slots__ = ("rows", "widths", "max_row", "max_column", "_max_lengths", "_width_start_rows")
+
+    def __init__(self, width_start_rows: dict = None):
+        self.rows = {}
+        self.widths = {}
+        self.max_row = 1
+        self.max_column = 1
+        self._max_lengths = {}
+        self._width_start_rows = width_start_rows or {}
+
+    def put(self, row: int, col: int, value, style: str = None):
+        self.rows.setdefault(row, {})[col] = (value, style)
+        if row > self.max_row:
+            self.max_row = row
+        if col > self.max_column:
+            self.max_column = col
+        if row >= self._width_start_rows.get(col, 1):
+            cell_len = display_width(value)
+            if cell_len > self._max_lengths.get(col, 0):
+                self._max_lengths[col] = cell_len
+
+    def max_text_length(self, col: int) -> int:
+        """该列（起算行之后）单元格的最大显示宽度。"""
+        return self._max_lengths.get(col, 0)
+
+
 class ExcelWriter:
+    """
+    流式（write_only）报告写入器：write_*_sheet 只把内容和样式名记入行计划，
+    save() 时每个单元格以最终样式作为 WriteOnlyCell 写出一次，不在内存中保留整张表的单元格对象图。
+    """
+    _THIN = Side(style='thin')
+    _THIN_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+
+    # 样式注册表：每种样式在工作簿中注册为一个 NamedStyle，单元格只引用样式名，
+    # 不再为每个单元格单独构造、哈希 Font/Border/Alignment，styles.xml 也只有这几条记录。
+    STYLES = {
+        "intro": {"font": Font(name="宋体", size=12), "alignment": Alignment(wrap_text=True)},
+        "verification_title": {"font": Font(name="宋体", size=12, bold=True)},
+        "verification_pass": {"font": Font(name="宋体", size=12, color="008000")},  # 绿色
+        "verification_fail": {"font": Font(name="宋体", size=12, color="FF0000")},
+        "verification_info": {"font": Font(name="宋体", size=12, italic=True, color="808080")},
+        "group_title": {"font": Font(name="黑体", size=12, bold=True), "alignment": Alignment(horizontal='left', vertical='center')},
+        "table_title": {"font": Font(name="黑体", size=12, bold=True)},
+        # 【核心修改】表头字体不再加粗，也居中
+        "table_header": {"font": Font(name="宋体", size=12, bold=False), "border": _THIN_BORDER,
+                         "alignment": Alignment(horizontal='center', vertical='center')},
+        # 【核心修改】所有单元格内容，无论文本还是数字，全部居中
+        "table_cell": {"font": Font(name="宋体", size=12), "border": _THIN_BORDER,
+                       "alignment": Alignment(horizontal='center', vertical='center', wrap_text=True)},
+        "table_number": {"font": Font(name="宋体", size=12), "border": _THIN_BORDER,
+                         "alignment": Alignment(horizontal='center', vertical='center', wrap_text=True),
+                         "number_format": '#,##0.00'},
+    }
+
+    @classmethod
+    def _register_named_styles(cls, workbook: Workbook):
+        """把 STYLES 中的每种样式作为 NamedStyle 注册到工作簿（每个工作簿只做一次）。"""
+        for name, attrs in cls.STYLES.items():
+            # 未指定边框的样式显式使用默认的空边框，与不设边框的单元格完全一致
+            workbook.add_named_style(NamedStyle(name=name, **{"border": DEFAULT_BORDER, **attrs}))
+
     def __init__(self, output_filepath: str):
         self.filepath = output_filepath
-        self.workbook = Workbook()
-        self.default_sheet = self.workbook.active
+        self.workbook = Workbook(write_only=True)
+        self._register_named_styles(self.workbook)
+        # Sheet名 -> _SheetBuffer，按写入顺序保存；同名Sheet再次写入时整体替换
+        self._sheets = {}
         print(f"初始化Excel写入器，目标文件: {self.filepath}")
 
     def write_notes_sheet(self, sheet_name: str, intro_text: str, notes_df: pd.DataFrame, verification_report: list):
@@ -17,38 +105,28 @@ class ExcelWriter:
         严格遵循正确的写入顺序：1.引言 -> 2.复核报告 -> 3.附注表格。
         """
         print(f"正在创建并写入 '{sheet_name}' Sheet页...")
-
-        if sheet_name in self.workbook.sheetnames:
-            ws = self.workbook[sheet_name]
-            ws.delete_rows(1, ws.max_row + 1)
-        else:
-            ws = self.workbook.create_sheet(title=sheet_name)
-
-        # 定义样式
-        intro_font = Font(name="宋体", size=12)
-        group_title_font = Font(name="黑体", size=12, bold=True)
-        verification_font = Font(name="宋体", size=12, italic=True, color="808080")
+        # A列从第3行起算列宽，跳过引言
+        sheet = self._sheets[sheet_name] = _SheetBuffer(width_start_rows={1: 3})
 
         current_row = 1
 
         # --- 步骤 1: 写入引言文本 ---
         if intro_text:
-            ws.cell(row=current_row, column=1, value=intro_text).font = intro_font
-            ws.cell(row=current_row, column=1).alignment = Alignment(wrap_text=True)
+            sheet.put(current_row, 1, intro_text, "intro")
             current_row += 2
 
         # --- 步骤 2: 【核心修复】先写入复核报告 ---
         if verification_report:
-            ws.cell(row=current_row, column=1, value="--- 数据内部复核结果 ---").font = Font(name="宋体", size=12, bold=True)
+            sheet.put(current_row, 1, "--- 数据内部复核结果 ---", "verification_title")
             current_row += 1
             for report_line in verification_report:
-                cell = ws.cell(row=current_row, column=1, value=report_line)
                 if "✅" in report_line:
-                    cell.font = Font(name="宋体", size=12, color="008000") # 绿色
+                    style = "verification_pass"
                 elif "❌" in report_line:
-                    cell.font = Font(name="宋体", size=12, color="FF0000")
+                    style = "verification_fail"
                 else:
-                    cell.font = verification_font
+                    style = "verification_info"
+                sheet.put(current_row, 1, report_line, style)
                 current_row += 1
             current_row += 1 # 复核报告后空一行
 
@@ -56,8 +134,7 @@ class ExcelWriter:
         if not notes_df.empty:
             note_number = 1
             for group_name, group_df in notes_df.groupby('附注组名',sort=False):
-                ws.cell(row=current_row, column=1, value=f"{note_number}.{group_name}").font = group_title_font                
-                ws.cell(row=current_row, column=1).alignment = Alignment(horizontal='left', vertical='center')
+                sheet.put(current_row, 1, f"{note_number}.{group_name}", "group_title")
                 current_row += 1
                 note_number += 1
 
@@ -66,143 +143,92 @@ class ExcelWriter:
                 total_end = table_df['期末数'].sum()
                 total_row = pd.DataFrame([{'项目': '合    计', '期初数': total_start, '期末数': total_end}])
                 table_df = pd.concat([table_df, total_row], ignore_index=True)
-                for r_idx, record in enumerate(dataframe_to_rows(table_df, index=False, header=True), current_row):
-                    for c_idx, value in enumerate(record, 1):
-                        ws.cell(row=r_idx, column=c_idx, value=value)
-                
                 # 调用我们统一的格式刷
-                self._apply_table_style(ws, current_row, current_row + len(table_df), 1, len(table_df.columns))
-                
+                self._put_table(sheet, current_row, table_df)
+
                 current_row += len(table_df) + 2
 
-        # --- 步骤 4: 调整列宽 (使用我们已修复好的版本) ---
-        for col_idx, col in enumerate(ws.columns, 1):
-            max_length = 0
-            column_letter = col[0].column_letter
-            start_row_for_calc = 3 if column_letter == 'A' else 1
-            for row_idx in range(start_row_for_calc, ws.max_row + 1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                try:
-                    cell_len = 0
-                    if cell.value:
-                        for char in str(cell.value):
-                            cell_len += 2 if '\u4e00' <= char <= '\u9fff' else 1
-                    if cell_len > max_length:
-                        max_length = cell_len
-                except:
-                    pass
-            adjusted_width = max((min(max_length, 40), 12)) + 2
-            ws.column_dimensions[column_letter].width = adjusted_width
+        # --- 步骤 4: 调整列宽 (各列最大显示宽度已在写入时累计) ---
+        for col_idx in range(1, sheet.max_column + 1):
+            max_length = sheet.max_text_length(col_idx)
+            sheet.widths[col_idx] = max((min(max_length, 40), 12)) + 2
 
         print(f"✅ '{sheet_name}' Sheet页已成功写入并格式化。")
-    
+
     def write_audit_sheet(self, sheet_name: str, tables_dict: dict):
             """
             在一个新的Sheet页中，写入“审计事项说明”的多个表格及其标题。
             """
             print(f"正在创建并写入 '{sheet_name}' Sheet页...")
+            sheet = self._sheets[sheet_name] = _SheetBuffer()
 
-            if sheet_name in self.workbook.sheetnames:
-                ws = self.workbook[sheet_name]
-                ws.delete_rows(1, ws.max_row + 1)
-            else:
-                ws = self.workbook.create_sheet(title=sheet_name)
-
-            # 定义标题样式
-            title_font = Font(name="黑体", size=12, bold=True)
             current_row = 1
 
             for title, df in tables_dict.items():
                 if df.empty:
                     continue
                 # 1. 写入主标题
-                ws.cell(row=current_row, column=1, value=title).font = title_font
+                sheet.put(current_row, 1, title, "table_title")
                 current_row += 1
 
-                # 2. 写入DataFrame到Excel
-                for r_idx, record in enumerate(dataframe_to_rows(df, index=False, header=True), current_row):
-                    for c_idx, value in enumerate(record, 1):
-                        ws.cell(row=r_idx, column=c_idx, value=value)
-                
-                # 3. 【核心修改】调用通用的样式函数来格式化刚刚写入的表格
-                table_start_row = current_row
-                table_end_row = current_row + len(df)
-                table_start_col = 1
-                table_end_col = len(df.columns)
-                self._apply_table_style(ws, table_start_row, table_end_row, table_start_col, table_end_col)
-                
+                # 2. 【核心修改】表格内容与通用表格样式一起记入行计划
+                self._put_table(sheet, current_row, df)
+
                 # 更新下一张表的起始行
-                current_row += len(df) + 2 
+                current_row += len(df) + 2
 
             # 自动调整列宽 (逻辑不变)
-            # ... (此处的列宽调整代码保持不变) ...
-            for col in ws.columns:
-                max_length = 0
-                column_letter = col[0].column_letter
-                for cell in col:
-                    try:
-                        cell_len = 0
-                        if cell.value:
-                            for char in str(cell.value):
-                                cell_len += 2 if '\u4e00' <= char <= '\u9fff' else 1
-                        if cell_len > max_length:
-                            max_length = cell_len
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) * 1.2
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-
-            print(f"✅ '{sheet_name}' Sheet页已成功写入。")    
-
-    def _apply_table_style(self, ws, start_row, end_row, start_col, end_col):
+            for col_idx in range(1, sheet.max_column + 1):
+                max_length = sheet.max_text_length(col_idx)
+                sheet.widths[col_idx] = (max_length + 2) * 1.2
+
+            print(f"✅ '{sheet_name}' Sheet页已成功写入。")
+
+    def _put_table(self, sheet: _SheetBuffer, start_row: int, df: pd.DataFrame):
         """
-        一个通用的函数，为指定的表格范围应用统一的、专业的财务报表样式。
+        把一个 DataFrame（含表头）记入行计划，并为每个单元格指定统一的、专业的财务报表样式：
+        表头居中加边框，数据行居中、自动换行、加边框，数字使用千分位两位小数。
         """
-        # 定义字体
-        content_font = Font(name="宋体", size=12)
-        # 【核心修改】表头字体不再加粗
-        header_font = Font(name="宋体", size=12, bold=False)
-        
-        # 定义边框
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                             top=Side(style='thin'), bottom=Side(style='thin'))
-
-        # 格式化表头
-        header_row_index = start_row
-        for col_idx in range(start_col, end_col + 1):
-            cell = ws.cell(row=header_row_index, column=col_idx)
-            cell.font = header_font
-            # 【核心修改】背景色填充的逻辑被移除
-            # cell.fill = header_fill (这行被删除)
-            cell.border = thin_border
-            # 【核心修改】表头也居中
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-
-        # 格式化数据行
-        for row_idx in range(start_row + 1, end_row + 1):
-            for col_idx in range(start_col, end_col + 1):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                cell.font = content_font
-                cell.border = thin_border
-                # 【核心修改】所有单元格内容，无论文本还是数字，全部居中
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                # 数字格式化逻辑可以保留
-                if isinstance(cell.value, (int, float)):
-                    cell.number_format = '#,##0.00'
-    def save(self):
-        # (此函数保持不变)
+        for r_idx, record in enumerate(dataframe_to_rows(df, index=False, header=True), start_row):
+            for c_idx, value in enumerate(record, 1):
+                if r_idx == start_row:
+                    style = "table_header"
+                elif isinstance(value, (int, float)):
+                    style = "table_number"
+                else:
+                    style = "table_cell"
+                sheet.put(r_idx, c_idx, value, style)
+
+    def _stream_sheet(self, sheet_name: str, sheet: _SheetBuffer):
+        """按行号顺序把一个Sheet页的行计划写入 write_only 工作表。"""
+        ws = self.workbook.create_sheet(title=sheet_name)
+        # write_only 模式下列宽必须在写出第一行之前设置
+        for col_idx, width in sheet.widths.items():
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+        for row_idx in range(1, sheet.max_row + 1):
+            cells = sheet.rows.get(row_idx)
+            if not cells:
+                ws.append([])
+                continue
+            row = [None] * max(cells)
+            for col_idx, (value, style) in cells.items():
+                cell = WriteOnlyCell(ws, value=value)
+                if style:
+                    cell.style = style
+                row[col_idx - 1] = cell
+            ws.append(row)
+
+    def save(self) -> bool:
         try:
-            # if self.default_sheet in self.workbook.sheetnames:
-            #     self.workbook.remove(self.default_sheet)
-            # self.workbook.save(self.filepath)
-            if "Sheet" in self.workbook.sheetnames:
-                default_sheet = self.workbook["Sheet"]
-                # 确保我们创建的Sheet页数量大于1，才删除默认页，避免删掉唯一的Sheet
-                if len(self.workbook.sheetnames) > 1:
-                    self.workbook.remove(default_sheet)
-                    print("  -> 已自动删除默认创建的空白'Sheet'页。")
+            for sheet_name, sheet in self._sheets.items():
+                self._stream_sheet(sheet_name, sheet)
+            if not self._sheets:
+                # 与普通模式保持一致：没有写入任何内容时，保存一个空白的默认'Sheet'页
+                self.workbook.create_sheet(title="Sheet")
             self.workbook.save(self.filepath)
             print(f"✅ Excel报告已成功保存到: {self.filepath}")
+            return True
         except Exception as e:
-            print(f"❌ 错误：保存Excel文件时发生错误: {e}")
\ No newline at end of file
+            print(f"❌ 错误：保存Excel文件时发生错误: {e}")
+            return False
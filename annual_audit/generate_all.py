@@ -1,10 +1,11 @@
 import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from docxtpl import DocxTemplate
-from docx import Document
 from docx.shared import Pt, Inches
 from docx.oxml.ns import qn
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from context_utils import build_report_context
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -17,76 +18,29 @@ note_template = "fuzhu.docx"
 output_main = "审计事项说明.docx"
 output_note = "报表附注.docx"
 
-def load_clean_df(path):
-    df = pd.read_excel(path)
-    df.columns = df.columns.str.strip()
-    df.iloc[:, 0] = df.iloc[:, 0].astype(str).str.strip()
-    return df
-
-def generate_main_report():
-    activity_df = load_clean_df(activity_file)
-    balance_df = load_clean_df(balance_file)
-    map_df = pd.read_excel(mapping_file)
-    map_df['column'] = map_df['column'].fillna('本年累计数_合计').astype(str).str.strip()
-    map_df['project_name'] = map_df['project_name'].astype(str).str.strip()
-    map_df['source_sheet'] = map_df['source_sheet'].astype(str).str.strip()
-
-    values = {}
-    for _, row in map_df.iterrows():
-        sheet = row['source_sheet']
-        item = row['project_name']
-        col = row['column']
-        df = activity_df if sheet == "业务活动表" else balance_df if sheet == "资产负债表" else None
-        val = df[df.iloc[:, 0] == item][col].values[0] if df is not None and col in df.columns and not df[df.iloc[:, 0] == item].empty else None
-        values[(sheet, item)] = val
-
-    context = {row['context_key']: values.get((row['source_sheet'], row['project_name']), None) for _, row in map_df.iterrows()}
+def load_report_context():
+    """读取全部输入并构建两份报告共用的上下文（每个文件只读取一次）。"""
+    return build_report_context(activity_file, balance_file, mapping_file, task_file)
 
-    doc = DocxTemplate(main_template)
-
-    task_df = pd.read_excel(task_file)
-    if not task_df.empty:
-        task_context = task_df.iloc[0].dropna().to_dict()
-        context.update(task_context)
+def generate_main_report(report=None):
+    report = report if report is not None else load_report_context()
 
-    doc.render(context)
+    doc = DocxTemplate(main_template)
+    doc.render(dict(report["context"]))
     doc.save(output_main)
     print("✅ 审计事项说明生成完成")
 
-def generate_note_report():
-    activity_df = load_clean_df(activity_file)
-    balance_df = load_clean_df(balance_file)
-    combined_df = pd.concat([balance_df, activity_df], axis=0, ignore_index=True)
-
-    map_df = pd.read_excel(mapping_file)
-    map_df['column'] = map_df['column'].fillna('本年累计数_合计').astype(str).str.strip()
-    map_df['project_name'] = map_df['project_name'].astype(str).str.strip()
-    map_df['source_sheet'] = map_df['source_sheet'].astype(str).str.strip()
-
-    values = {}
-    for _, row in map_df.iterrows():
-        sheet = row['source_sheet']
-        item = row['project_name']
-        col = row['column']
-        df = activity_df if sheet == "业务活动表" else balance_df if sheet == "资产负债表" else None
-        val = df[df.iloc[:, 0] == item][col].values[0] if df is not None and col in df.columns and not df[df.iloc[:, 0] == item].empty else None
-        values[(sheet, item)] = val
-
-    context = {row['context_key']: values.get((row['source_sheet'], row['project_name']), None) for _, row in map_df.iterrows()}
-
-    task_df = pd.read_excel(task_file)
-    if not task_df.empty:
-        task_context = task_df.iloc[0].dropna().to_dict()
-        context.update(task_context)
-
-    # 渲染模板并保存为临时文件
-    intermediate_docx = "temp_note_rendered.docx"
+def generate_note_report(report=None):
+    report = report if report is not None else load_report_context()
+    combined_df = report["combined_df"]
+    context = dict(report["context"])
+
+    # 渲染模板后直接在内存中的文档对象上继续处理：
+    # 不再保存临时文件再用 python-docx 重新解析，同一目录下并发运行也不会互相覆盖
+    # （模板未使用 replace_pic 等替换，DocxTemplate.save 等价于直接保存 doc_tpl.docx）
     doc_tpl = DocxTemplate(note_template)
     doc_tpl.render(context)
-    doc_tpl.save(intermediate_docx)
-
-    # 用 python-docx 重新加载渲染后的文档
-    doc = Document(intermediate_docx)
+    doc = doc_tpl.docx
     # 删除所有残留 {tableX_starts} 或 {tableX_ends} 标签段落
     for p in doc.paragraphs[:]:
         if p.text.strip().startswith("{table") and p.text.strip().endswith("_starts}"):
@@ -174,7 +128,21 @@ def generate_note_report():
     doc.save(output_note)
     print("✅ 报表附注生成完成")
 
+def generate_all_reports(parallel=True):
+    """
+    共用一次上下文构建生成两份报告。parallel=True 时报表附注在子进程中渲染，
+    与当前进程中的审计事项说明同时进行，总耗时接近只生成其中一份。
+    """
+    report = load_report_context()
+    if not parallel:
+        generate_main_report(report)
+        generate_note_report(report)
+        return
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        note_future = executor.submit(generate_note_report, report)
+        generate_main_report(report)
+        note_future.result()
+
 if __name__ == "__main__":
-    generate_main_report()
-    generate_note_report()
+    generate_all_reports()
     print("✅✅ 全部报告生成完毕！")
@@ -0,0 +1,42 @@
+"""
+科目标签的归一化（带缓存）。
+
+同一批科目名称会在每个Sheet、每个单位中反复出现，归一化结果按输入文本缓存（有上限），
+返回值经过 sys.intern，相同的标签在内存中只保留一份，作为字典键比较时也更快。
+"""
+import re
+import sys
+from functools import lru_cache
+
+# 全角空格、不间断空格、制表符和换行统一折叠为普通空格
+_SPACE_FOLD = str.maketrans(dict.fromkeys("\u3000\u00A0\t\r\n", " "))
+
+# 科目名称前的序号，如 '（一）'、'(2)'
+ORDINAL_PREFIX = re.compile(r'^[（(][一二三四五六七八九十\d]+[）)]\s*')
+
+
+@lru_cache(maxsize=8192)
+def _normalize(text: str, compact: bool, strip_ordinal: bool) -> str:
+    text = text.translate(_SPACE_FOLD)
+    if strip_ordinal:
+        text = ORDINAL_PREFIX.sub('', text.strip(), count=1)
+    return sys.intern(("" if compact else " ").join(text.split()))
+
+
+def normalize_name(name, compact: bool = False, strip_ordinal: bool = False) -> str:
+    """
+    空白归一化：各种空白折叠为一个普通空格并去掉首尾空白。
+    compact=True 时去掉全部空白（'收 入 合 计' -> '收入合计'），用于按标签匹配；
+    strip_ordinal=True 时同时去掉开头的序号前缀。
+    """
+    return _normalize("" if name is None else str(name), compact, strip_ordinal)
+
+
+@lru_cache(maxsize=8192)
+def _strip_ordinal_prefix(text: str) -> str:
+    return sys.intern(ORDINAL_PREFIX.sub('', text, count=1).strip())
+
+
+def strip_ordinal_prefix(name) -> str:
+    """去掉开头的序号前缀和首尾空白，名称中间的空白保持不变（用于输出到报告的名称）。"""
+    return _strip_ordinal_prefix(str(name))
@@ -1,15 +1,46 @@
+import os
+
 from config_loader import ConfigLoader
 from data_processor import DataProcessor
 from excel_writer import ExcelWriter
+from stage_cache import StageCache
 
 # --- 全局配置 ---
 MAPPING_FILE = "mapping_file.xlsx"
 SOURCE_DATA_FILE = "annual_soce.xlsx"
 OUTPUT_REPORT_FILE = "审计报告数据_生成结果.xlsx"
+# 修改了提取或报告生成逻辑时递增，使旧的阶段缓存整体失效
+STAGE_CACHE_VERSION = 1
+
+
+def _print_cache_message(level, message):
+    print(f"  {message}")
+
+
+def _extract_report_data(config_loader):
+    """提取阶段：返回 (附注数据, 审计事项表格, 复核报告, 审计年度)。"""
+    # 源工作簿在整个提取阶段只打开一次，退出 with 时关闭
+    with DataProcessor(SOURCE_DATA_FILE, config_loader.configs, alias_resolver=config_loader.alias_resolver) as processor:
+        # get_notes_data现在会内部调用解析函数
+        notes_data_df = processor.get_notes_data()
+        if notes_data_df.empty:
+            return notes_data_df, {}, [], None
+
+        audit_matters_tables_dict = processor.get_audit_matters_tables()
+        verification_report = processor.run_verification_checks()
+        # 审计年度在上一步已提取并缓存，这里不会再次读取工作簿
+        audit_year = processor.extract_audit_year()
+    return notes_data_df, audit_matters_tables_dict, verification_report, audit_year
 
-def main():
-    """主调度函数，协调所有模块完成报告生成任务。"""
+
+def main(use_cache=True):
+    """
+    主调度函数，协调所有模块完成报告生成任务。
+    use_cache=True 时按源文件、mapping 的内容哈希缓存提取结果和生成的报告，输入未变化的阶段直接跳过。
+    """
     print("--- 开始执行自动化审计报告生成任务 ---")
+    # 输入文件按当前目录解析，阶段缓存也按当前目录区分项目
+    cache = StageCache(os.getcwd(), enabled=use_cache, version=STAGE_CACHE_VERSION, log=_print_cache_message)
 
     # 1. 加载配置
     config_loader = ConfigLoader(MAPPING_FILE)
@@ -17,24 +48,24 @@ def main():
         print("--- 任务因配置错误而终止 ---")
         return
     
-    # 2. 初始化数据处理器
-    processor = DataProcessor(SOURCE_DATA_FILE, config_loader.configs)
-    
-    # 3. 提取并处理数据
-    # get_notes_data现在会内部调用解析函数
-    notes_data_df = processor.get_notes_data()
+    # 2 & 3. 提取并处理数据（源文件和 mapping 均未变化时直接使用上次的提取结果）
+    notes_data_df, audit_matters_tables_dict, verification_report, audit_year = cache.run(
+        "extract", lambda: _extract_report_data(config_loader), files=[SOURCE_DATA_FILE, MAPPING_FILE]
+    )
 
     # 如果未能生成任何附注数据，则提前终止
     if notes_data_df.empty:
         print("未能生成任何有效的报表附注数据，任务终止。")
         return
 
-    audit_matters_tables_dict = processor.get_audit_matters_tables() 
-    verification_report = processor.run_verification_checks()
+    # 提取结果与上次完全一致、且上次生成的报告还在时，无需重新写出
+    if cache.artifact_is_fresh("report", OUTPUT_REPORT_FILE, deps=["extract"]):
+        print("--- 任务执行完毕 ---")
+        return
+
     # 4. 生成Excel报告
     writer = ExcelWriter(OUTPUT_REPORT_FILE)    
     # 自动提取年份并生成引言
-    audit_year = processor.extract_audit_year()
     if audit_year is None:
         intro_text = "（未能自动获取年份，请手动填写引言）"
     else:
@@ -61,7 +92,8 @@ def main():
         print("未找到审计事项说明数据，跳过相关Sheet的写入。")  
 
     # 5. 保存文件
-    writer.save()    
+    if writer.save():
+        cache.record_artifact("report", OUTPUT_REPORT_FILE, deps=["extract"])
     print("--- 任务执行完毕 ---")
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+mapping_file.xlsx 的编译缓存。
+
+把 ConfigLoader 加载的全部配置按文件内容的 sha256 作为键缓存起来：
+  1. 进程内缓存：同一次运行里第二次起直接返回同一个对象；
+  2. 磁盘缓存：写在当前用户自己的缓存目录（CACHE_DIR）下，不放进 mapping 所在的
+     （可能共享、会被整体拷走的）数据目录；文件内容未变时下次运行直接反序列化，不再解析 xlsx。
+     缓存文件以一个小文件头开头（版本、mapping 内容摘要、载荷摘要），
+     文件头校验全部通过后才反序列化后面的载荷。
+mapping 一旦被修改（内容哈希变化），缓存自动失效并重新编译。
+
+注意：返回的结构在多处共享，调用方只读、不要原地修改。
+修改了解析逻辑时请递增 CACHE_VERSION，使旧的磁盘缓存失效。
+"""
+import hashlib
+import json
+import os
+import pickle
+
+CACHE_VERSION = 3
+CACHE_MAGIC = b"AUDIT-MAPPING-CACHE\n"
+CACHE_SUFFIX = ".compiled.pkl"
+# 磁盘缓存目录：Windows 为 %LOCALAPPDATA%，其余系统为 $XDG_CACHE_HOME 或 ~/.cache
+CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "audit_mapping_cache",
+)
+
+_memo = {}
+
+
+def file_digest(path) -> str:
+    """返回文件内容的 sha256 十六进制摘要。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(path, name: str = "mapping", compile_fn=None) -> str:
+    """磁盘缓存文件路径：CACHE_DIR 下按 mapping 的绝对路径、name 和编译函数取哈希命名。"""
+    owner = "" if compile_fn is None else f"{compile_fn.__module__}.{compile_fn.__qualname__}"
+    key = hashlib.sha256(f"{os.path.abspath(os.fspath(path))}\0{name}\0{owner}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, f"{key}.{name}{CACHE_SUFFIX}")
+
+
+def _read_cache(cache_file: str, digest: str):
+    """先读文件头核对版本、mapping 摘要和载荷摘要，全部一致才反序列化载荷。"""
+    try:
+        with open(cache_file, "rb") as f:
+            if f.readline(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            header = json.loads(f.readline(4096))
+            if not isinstance(header, dict) or header.get("version") != CACHE_VERSION or header.get("digest") != digest:
+                return None
+            payload = f.read()
+        if hashlib.sha256(payload).hexdigest() != header.get("payload"):
+            return None
+        return pickle.loads(payload)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"  ⚠️ 编译缓存 {cache_file} 无法读取，将重新编译: {e}")
+        return None
+
+
+def _write_cache(cache_file: str, digest: str, data):
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        header = {"version": CACHE_VERSION, "digest": digest, "payload": hashlib.sha256(payload).hexdigest()}
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        with open(tmp_file, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(json.dumps(header).encode("ascii") + b"\n")
+            f.write(payload)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"  ⚠️ 编译缓存写入失败（不影响本次运行）: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def load_compiled(path, compile_fn, name: str = "mapping"):
+    """
+    通用入口：内容未变时返回缓存的编译结果，否则调用 compile_fn(path) 重新编译并写回缓存。
+    compile_fn 返回空值（解析失败）时不写缓存。
+    """
+    path = os.fspath(path)
+    digest = file_digest(path)
+    key = (os.path.abspath(path), name)
+    memo = _memo.get(key)
+    if memo is not None and memo[0] == digest:
+        return memo[1]
+
+    cache_file = cache_path_for(path, name, compile_fn)
+    data = _read_cache(cache_file, digest)
+    if data is None:
+        print(f"  正在编译 mapping 文件: {path}")
+        data = compile_fn(path)
+        if not data:
+            return data
+        _write_cache(cache_file, digest, data)
+    else:
+        print(f"  ⚡ mapping 文件未变化，已从编译缓存加载: {cache_file}")
+    _memo[key] = (digest, data)
+    return data
@@ -0,0 +1,169 @@
+from functools import lru_cache
+from openpyxl.utils.cell import coordinate_to_tuple
+from label_utils import normalize_name
+from keyword_matcher import KeywordMatcher
+
+
+@lru_cache(maxsize=4096)
+def _a1_to_tuple(coordinate: str) -> tuple:
+    """'C7' -> (7, 3)，同一坐标只解析一次。"""
+    return coordinate_to_tuple(coordinate)
+
+
+def normalize_label(value) -> str:
+    """标签归一化：去掉首尾及中间的所有空白（含全角空格），如 '存  货' -> '存货'。结果带缓存。"""
+    return normalize_name(str(value), compact=True)
+
+
+class LabelIndex:
+    """
+    标签文本 -> (行, 列) 的哈希索引。
+
+    建立时按“行优先、同一行内按列顺序”扫描一次，同一标签出现多次时保留最先出现的位置，
+    与原先逐行扫描“命中即停”的结果一致。之后每次查找都是一次字典命中，
+    成本只与 mapping 的条目数有关，与Sheet的行数无关。
+    """
+    __slots__ = ("_positions",)
+
+    def __init__(self, grid, columns=(1,), min_row: int = 1, max_row: int = None):
+        positions = {}
+        for row_idx, row in grid.iter_rows(min_row, max_row):
+            for col in columns:
+                value = row[col - 1] if col <= len(row) else None
+                if not value:
+                    continue
+                key = normalize_label(value)
+                if key and key not in positions:
+                    positions[key] = (row_idx, col)
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, label) -> bool:
+        return self.get(label) is not None
+
+    def get(self, label):
+        """精确查找，返回 (行, 列)；找不到返回 None。"""
+        if label is None:
+            return None
+        return self._positions.get(normalize_label(label))
+
+    def first(self, labels):
+        """多个候选标签（如同一科目的全部别名）中，返回位置最靠前的精确命中。"""
+        hits = [pos for pos in map(self.get, labels) if pos is not None]
+        return min(hits) if hits else None
+
+    def find(self, label):
+        """
+        先做精确命中；没有时退回“包含”匹配（label 是单元格文本的一部分），
+        只在去重后的标签上比较，返回位置最靠前的一个。
+        """
+        key = normalize_label(label) if label is not None else ""
+        if not key:
+            return None
+        hit = self._positions.get(key)
+        if hit is not None:
+            return hit
+        matches = [pos for text, pos in self._positions.items() if key in text]
+        return min(matches) if matches else None
+
+    def find_many(self, labels) -> dict:
+        """
+        批量 find：返回 {label: (行, 列)}，找不到的 label 不出现在结果中。
+        精确命中之外的 label 编译成一个多关键字自动机，对去重后的标签各扫描一遍即可得到所有“包含”命中，
+        不再为每个 label 遍历全部标签。
+        """
+        result, pending = {}, {}
+        for label in labels:
+            key = normalize_label(label) if label is not None else ""
+            if not key:
+                continue
+            hit = self._positions.get(key)
+            if hit is not None:
+                result[label] = hit
+            else:
+                pending.setdefault(key, []).append(label)
+        if not pending:
+            return result
+
+        # 待查标签组每次都不同，不放进 KeywordMatcher.of 的缓存
+        matcher = KeywordMatcher(tuple(pending))
+        first = {}
+        for text, pos in self._positions.items():
+            for key in matcher.matches(text):
+                if key not in first or pos < first[key]:
+                    first[key] = pos
+        for key, pending_labels in pending.items():
+            if key in first:
+                for label in pending_labels:
+                    result[label] = first[key]
+        return result
+
+
+class SheetGrid:
+    """
+    工作表的“纯数值快照”。
+
+    通过一次 iter_rows(values_only=True) 把已用区域读成二维元组，
+    之后所有按 (行, 列) 或 A1 坐标的取值都是 O(1) 的下标访问，
+    不再为每次读取创建 openpyxl 的 Cell 对象。行号、列号均从 1 开始，
+    越界时返回 None，与读取空单元格的行为一致。
+    """
+    __slots__ = ("title", "_rows", "max_row", "max_column", "_label_indexes")
+
+    def __init__(self, rows, title: str = ""):
+        self.title = title
+        self._rows = [tuple(row) for row in rows]
+        self.max_row = len(self._rows)
+        self.max_column = max((len(row) for row in self._rows), default=0)
+        self._label_indexes = {}
+
+    @classmethod
+    def from_worksheet(cls, ws) -> "SheetGrid":
+        return cls(ws.iter_rows(values_only=True), title=ws.title)
+
+    @classmethod
+    def of(cls, ws_or_grid) -> "SheetGrid":
+        """已经是快照则原样返回，否则从工作表生成快照。"""
+        if isinstance(ws_or_grid, cls):
+            return ws_or_grid
+        return cls.from_worksheet(ws_or_grid)
+
+    def value(self, row: int, col: int):
+        if row < 1 or col < 1:
+            return None
+        try:
+            return self._rows[row - 1][col - 1]
+        except IndexError:
+            return None
+
+    def __getitem__(self, key):
+        """支持 grid["C7"] 与 grid[7, 3] 两种写法。"""
+        if isinstance(key, str):
+            key = _a1_to_tuple(key)
+        row, col = key
+        return self.value(row, col)
+
+    def row(self, row: int) -> tuple:
+        """返回整行的数值元组，越界时返回空元组。"""
+        if 1 <= row <= self.max_row:
+            return self._rows[row - 1]
+        return ()
+
+    def iter_rows(self, min_row: int = 1, max_row: int = None):
+        """按行遍历，产出 (行号, 数值元组)。"""
+        max_row = self.max_row if max_row is None else min(max_row, self.max_row)
+        for row_idx in range(max(min_row, 1), max_row + 1):
+            yield row_idx, self._rows[row_idx - 1]
+
+    def label_index(self, columns=(1,), min_row: int = 1, max_row: int = None) -> LabelIndex:
+        """
+        返回指定标签列、行范围上的 LabelIndex，同样的参数只建立一次。
+        资产负债表是 A/E 双栏布局，传 columns=(1, 5) 即可同时索引两栏。
+        """
+        key = (tuple(columns), min_row, max_row)
+        index = self._label_indexes.get(key)
+        if index is None:
+            index = self._label_indexes[key] = LabelIndex(self, columns, min_row, max_row)
+        return index
@@ -0,0 +1,94 @@
+"""
+年度审计的数据复核规则（声明式）。
+
+每条规则是一行配置，比较“计算”与“报表”两个表达式的值：
+    规则名称 | 计算 | 报表 | 左标签 | 右标签 | 容差
+表达式由若干项以 + / - 连接，每一项可以是：
+  - 组:<附注组名>   附注数据中该组全部科目的期末数之和；
+  - 报表:<总计名>   从报表中直接提取的复核总计值（收入合计、费用合计、期初净资产、期末净资产）；
+  - <科目名>        附注数据中该科目的期末数。
+同号的附注项按并集一次筛选求和（与逐项相加等价，科目不重复计入）。
+
+mapping_file.xlsx 中有“复核规则”Sheet 时使用其中的规则，否则使用 DEFAULT_RULES。
+"""
+import re
+
+import pandas as pd
+
+DEFAULT_TOLERANCE = 1e-6
+
+DEFAULT_RULES = [
+    {'规则名称': '收入内部核对', '计算': '组:收入', '报表': '报表:收入合计'},
+    {'规则名称': '支出内部核对', '计算': '业务活动成本 + 管理费用 + 筹资费用 + 其他费用', '报表': '报表:费用合计'},
+    {'规则名称': '收支与净资产联动核对', '计算': '报表:收入合计 - 报表:费用合计',
+     '报表': '报表:期末净资产 - 报表:期初净资产', '左标签': '收支差额', '右标签': '净资产变动'},
+]
+
+_TERM_SPLIT = re.compile(r'\s*([+\-＋－])\s*')
+_GROUP_PREFIX = '组:'
+_REPORT_PREFIX = '报表:'
+
+
+def parse_expression(expr) -> list:
+    """把 'A + B - 报表:C' 解析为 [(1, 'A'), (1, 'B'), (-1, '报表:C')]。"""
+    terms, sign = [], 1
+    for token in _TERM_SPLIT.split(str(expr).replace('：', ':').strip()):
+        if token in ('+', '＋'):
+            sign = 1
+        elif token in ('-', '－'):
+            sign = -1
+        elif token:
+            terms.append((sign, token))
+            sign = 1
+    return terms
+
+
+def load_rules(rules_df: pd.DataFrame = None) -> list:
+    """从“复核规则”Sheet 读取规则（缺少的标签 / 容差使用默认值）；Sheet 不存在或为空时返回 DEFAULT_RULES。"""
+    if rules_df is None or rules_df.empty:
+        rules = DEFAULT_RULES
+    else:
+        rules = [
+            {key: value for key, value in row.items() if pd.notna(value)}
+            for row in rules_df.to_dict('records')
+            if pd.notna(row.get('规则名称')) and pd.notna(row.get('计算')) and pd.notna(row.get('报表'))
+        ]
+    return [{
+        '规则名称': str(rule['规则名称']).strip(),
+        '计算': parse_expression(rule['计算']),
+        '报表': parse_expression(rule['报表']),
+        '左标签': str(rule.get('左标签', '计算值')).strip(),
+        '右标签': str(rule.get('右标签', '报表值')).strip(),
+        '容差': float(rule.get('容差', DEFAULT_TOLERANCE)),
+    } for rule in rules]
+
+
+def evaluate_expression(terms, notes_df: pd.DataFrame, verification_totals: dict) -> float:
+    """求一个已解析表达式的值：报表总计直接相加，附注项按符号分别做一次 isin 筛选求和。"""
+    value = 0
+    for sign in (1, -1):
+        groups = [name[len(_GROUP_PREFIX):] for s, name in terms if s == sign and name.startswith(_GROUP_PREFIX)]
+        items = [name for s, name in terms
+                 if s == sign and not name.startswith(_GROUP_PREFIX) and not name.startswith(_REPORT_PREFIX)]
+        if groups or items:
+            mask = notes_df['附注组名'].isin(groups) | notes_df['项目'].isin(items)
+            value += sign * notes_df.loc[mask, '期末数'].sum()
+    for sign, name in terms:
+        if name.startswith(_REPORT_PREFIX):
+            value += sign * verification_totals.get(name[len(_REPORT_PREFIX):], 0)
+    return value
+
+
+def run_rules(rules, notes_df: pd.DataFrame, verification_totals: dict) -> list:
+    """逐条求值规则，返回复核提示文字列表。"""
+    results = []
+    for rule in rules:
+        calc_value = evaluate_expression(rule['计算'], notes_df, verification_totals)
+        report_value = evaluate_expression(rule['报表'], notes_df, verification_totals)
+        values = f"{rule['左标签']} {calc_value:,.2f} vs {rule['右标签']} {report_value:,.2f}"
+        if abs(calc_value - report_value) < rule['容差']:
+            results.append(f"✅ {rule['规则名称']}成功: {values}")
+        else:
+            diff = calc_value - report_value
+            results.append(f"❌ {rule['规则名称']}失败: {values} (差额: {diff:,.2f})")
+    return results
@@ -0,0 +1,58 @@
+from openpyxl import load_workbook
+from sheet_grid import SheetGrid
+
+
+class WorkbookSession:
+    """
+    源数据工作簿会话：每次运行只打开一次源文件，供所有解析函数共用，
+    并在结束时确定性地关闭。
+
+    工作簿以只读模式打开，解析函数通过 grid() 取得各Sheet的数值快照，
+    每个Sheet只流式读取一次。
+
+    用法：
+        with WorkbookSession("annual_soce.xlsx") as session:
+            grid = session.grid('资产负债表')
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._workbook = None
+        self._grids = {}
+
+    @property
+    def workbook(self):
+        """首次访问时才真正加载工作簿，之后一直复用同一个对象。"""
+        if self._workbook is None:
+            print(f"  正在打开源数据工作簿: {self.filepath}")
+            self._workbook = load_workbook(self.filepath, read_only=True, data_only=True)
+        return self._workbook
+
+    @property
+    def sheetnames(self) -> list:
+        return self.workbook.sheetnames
+
+    def __getitem__(self, sheet_name: str):
+        return self.workbook[sheet_name]
+
+    def __contains__(self, sheet_name: str) -> bool:
+        return sheet_name in self.workbook.sheetnames
+
+    def grid(self, sheet_name: str) -> SheetGrid:
+        """返回指定Sheet的数值快照，首次调用时生成并缓存。"""
+        if sheet_name not in self._grids:
+            self._grids[sheet_name] = SheetGrid.from_worksheet(self.workbook[sheet_name])
+        return self._grids[sheet_name]
+
+    def close(self):
+        """释放工作簿。可以重复调用；关闭后再次访问会重新打开文件。"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        self._grids.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
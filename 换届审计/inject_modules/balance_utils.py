@@ -1,7 +1,10 @@
 import openpyxl
 from openpyxl.utils import get_column_letter # 移除 coordinate_to_tuple 导入
+from modules.sheet_grid import SheetGrid
 
 def get_balance_core_data(ws_balance, block_map, alias_dict):
+    # ws_balance 可以是工作表或 SheetGrid，统一转换为数值快照读取
+    ws_balance = SheetGrid.of(ws_balance)
     # print(f"DEBUG_BALANCE: 进入 get_balance_core_data 函数...")
     # print(f"DEBUG_BALANCE: Source Sheet Name: {ws_balance.title}")
     # print(f"DEBUG_BALANCE: Block Map Keys: {list(block_map.keys())}")
@@ -68,7 +71,7 @@ def get_balance_core_data(ws_balance, block_map, alias_dict):
         initial_cell_coordinate = f"{get_column_letter(col_initial)}{row_to_read}"
         ##print(f"DEBUG_BALANCE: 尝试读取 期初值 从单元格: '{initial_cell_coordinate}'")
         try:
-            initial_value_raw = ws_balance[initial_cell_coordinate].value
+            initial_value_raw = ws_balance[initial_cell_coordinate]
             initial_value = non_numeric_to_zero(initial_value_raw, initial_cell_coordinate)
             result[f"期初{field_alias}"] = initial_value
             ##print(f"DEBUG_BALANCE: 期初{field_alias} (从 {initial_cell_coordinate}) 读取值: {initial_value_raw} -> {initial_value}")
@@ -80,7 +83,7 @@ def get_balance_core_data(ws_balance, block_map, alias_dict):
         final_cell_coordinate = f"{get_column_letter(col_final)}{row_to_read}"
         ##print(f"DEBUG_BALANCE: 尝试读取 期末值 从单元格: '{final_cell_coordinate}'")
         try:
-            final_value_raw = ws_balance[final_cell_coordinate].value
+            final_value_raw = ws_balance[final_cell_coordinate]
             final_value = non_numeric_to_zero(final_value_raw, final_cell_coordinate)
             result[f"期末{field_alias}"] = final_value
             ##print(f"DEBUG_BALANCE: 期末{field_alias} (从 {final_cell_coordinate}) 读取值: {final_value_raw} -> {final_value}")
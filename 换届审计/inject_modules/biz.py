@@ -5,6 +5,9 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.workbook import Workbook
 import logging
 import re
+from modules.mapping_cache import mapping_frame
+from modules.utils import strip_ordinal_prefix
+from inject_modules.style_registry import apply_style
 
 def find_correct_year_column(df_sheet: pd.DataFrame, year: str):
     """在一个业务活动表DataFrame中，根据年份标题行找到正确的金额列索引。"""
@@ -24,7 +27,7 @@ def get_income_expense_summary(wb_src: Workbook, mapping_file_path: str):
     """
     try:
         # 1. 读取科目配置
-        df_raw_subjects = pd.read_excel(mapping_file_path, sheet_name="业务活动表汇总注入配置", header=None)
+        df_raw_subjects = mapping_frame(mapping_file_path, "业务活动表汇总注入配置", header=None)
         header_row_index = df_raw_subjects[df_raw_subjects[0] == '类型'].index[0]
         correct_headers = df_raw_subjects.iloc[header_row_index].tolist()
         df_subjects = df_raw_subjects.iloc[header_row_index + 1:]
@@ -33,7 +36,7 @@ def get_income_expense_summary(wb_src: Workbook, mapping_file_path: str):
         expense_subjects = df_subjects[df_subjects['类型'] == '支出']['科目名称'].tolist()
 
         # 2. 【核心修复】读取并解析全局审计期间
-        df_header = pd.read_excel(mapping_file_path, sheet_name="HeaderMapping", header=None)
+        df_header = mapping_frame(mapping_file_path, "HeaderMapping", header=None)
         audit_period_row = df_header.loc[df_header[0] == '期末']
         audit_period_str = audit_period_row.iloc[0, 2]
         match = re.match(r'(\d{4})年(\d{1,2})月[-至](\d{4})年(\d{1,2})月', audit_period_str.replace(" ", ""))
@@ -71,7 +74,7 @@ def get_income_expense_summary(wb_src: Workbook, mapping_file_path: str):
             amount_col_idx = find_correct_year_column(df, str(current_year))
             df_year_data = df.iloc[:, [0, amount_col_idx]].copy()
             df_year_data.columns = ['科目', '金额']
-            df_year_data['科目'] = df_year_data['科目'].astype(str).str.replace(r'^\s*[（(].*?[)）]\s*', '', regex=True).str.strip()
+            df_year_data['科目'] = df_year_data['科目'].astype(str).map(strip_ordinal_prefix)
             df_year_data['项目'] = project_name # <-- 使用新生成的项目名称
             all_data.append(df_year_data)
 
@@ -105,7 +108,7 @@ def inject_income_expense_sheets(wb_tgt: Workbook, income_df: pd.DataFrame, expe
         for r_idx, row in enumerate(df.itertuples(index=False), 2):
             for c_idx, value in enumerate(row, 1):
                 cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                if isinstance(value, (int, float)): cell.number_format = '#,##0.00'
+                if isinstance(value, (int, float)): apply_style(cell, "money")
 
     for sheet_name, df in [("收入汇总", income_df), ("支出汇总", expense_df)]:
         if not df.empty and sheet_name in wb_tgt.sheetnames:
@@ -0,0 +1,121 @@
+# inject_modules/format_plan.py
+"""
+全局数字格式的“格式计划”。
+
+报表中会出现数值的位置完全由 mapping_file.xlsx 描述：
+  - 业务活动表：行次列（B列）+ “业务活动表逐行”目标期初/期末坐标所在的金额列；
+  - 资产负债变动：inj1 / inj3 的目标单元格、inj2 各区块从目标起始行往下的期初/期末/变动三列、
+    “合计公式配置”的变动单元格；
+  - 收入汇总 / 支出汇总：由 DataFrame 写入，第1行是表头、A列是年份，数值只在 B2 起的区域。
+这里把这些位置一次性编译成按Sheet类型划分的区域列表，apply_global_formatting 只检查
+这些区域里的单元格，不再对每张表 iter_rows() 探测全部单元格。
+计划中没有登记的Sheet仍按原来的方式逐格探测。
+
+区域统一表示为 (min_row, min_col, max_row, max_col)，max_row / max_col 为 None 时表示到工作表末尾。
+"""
+import pandas as pd
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+
+from inject_modules.merged_cells import get_top_left_merged_cell_address
+from modules.mapping_cache import load_compiled_mapping, mapping_frame
+
+ACTIVITY_SHEET_KEY = "业务活动表"
+
+
+def _cell_region(address):
+    """把 'B12' 这样的坐标转成单格区域；空值或非法坐标返回 None。"""
+    if address is None or pd.isna(address):
+        return None
+    address = str(address).strip()
+    if not address:
+        return None
+    try:
+        row, col = coordinate_to_tuple(address)
+    except Exception:
+        return None
+    return (row, col, row, col)
+
+
+def _cell_regions(addresses) -> list:
+    return [region for region in map(_cell_region, addresses) if region is not None]
+
+
+def _activity_regions(yewu_line_map) -> list:
+    # B列（行次列），整列
+    regions = [(1, 2, None, 2)]
+    # 金额列按列登记：从该列第一个目标坐标所在行起到表尾，模板里同列的其他数值也一并覆盖
+    first_row_by_col = {}
+    for item in yewu_line_map or []:
+        for region in _cell_regions([item.get("目标期初坐标"), item.get("目标期末坐标")]):
+            row, col = region[0], region[1]
+            first_row_by_col[col] = min(row, first_row_by_col.get(col, row))
+    for col, row in sorted(first_row_by_col.items()):
+        regions.append((row, col, None, col))
+    return regions
+
+
+def _balance_change_regions(inj: dict, formula_df: pd.DataFrame) -> list:
+    regions = []
+
+    _, df1 = inj.get("inj1", ({}, pd.DataFrame()))
+    for col in ["目标单元格（期初）", "目标单元格（期末）", "变动单元格"]:
+        if col in df1.columns:
+            regions += _cell_regions(df1[col])
+
+    # inj2 的明细行数随源数据变化：从目标起始单元格所在行起，往下到表尾的期初/期末/变动三列
+    _, df2 = inj.get("inj2", ({}, pd.DataFrame()))
+    if "目标起始单元格" in df2.columns:
+        for start_cell in df2["目标起始单元格"]:
+            start = _cell_region(start_cell)
+            if start is None:
+                continue
+            row, col = start[0], start[1]
+            regions.append((row, col + 1, None, col + 3))
+
+    _, df3 = inj.get("inj3", ({}, pd.DataFrame()))
+    for col in ["目标单元格（期初）", "目标单元格（期末）", "增加单元格", "减少单元格"]:
+        if col in df3.columns:
+            regions += _cell_regions(df3[col])
+
+    if formula_df is not None and "变动单元格" in formula_df.columns:
+        regions += _cell_regions(formula_df["变动单元格"])
+    return regions
+
+
+def compile_format_plan(mapping_path) -> dict:
+    """
+    从 mapping 编译格式计划：{Sheet名或Sheet类型: [区域, ...]}。
+    业务活动表的各年度副本共用 ACTIVITY_SHEET_KEY 这一项。
+    """
+    compiled = load_compiled_mapping(mapping_path)
+    try:
+        formula_df = mapping_frame(mapping_path, "合计公式配置")
+    except Exception:
+        formula_df = None
+
+    summary_table_regions = [(2, 2, None, None)]
+    return {
+        ACTIVITY_SHEET_KEY: _activity_regions(compiled["mapping"].get("yewu_line_map")),
+        "资产负债变动": _balance_change_regions(compiled["inj"], formula_df),
+        "收入汇总": summary_table_regions,
+        "支出汇总": summary_table_regions,
+    }
+
+
+def iter_planned_cells(ws, regions):
+    """
+    按计划区域给出需要检查的单元格（去重，按行列顺序）。
+    区域会被裁剪到工作表已用范围之内，不会在已用范围之外新建单元格；
+    落在合并区域中的坐标改为其左上角单元格（注入时数值也是写在左上角）。
+    """
+    max_row, max_col = ws.max_row, ws.max_column
+    coords = set()
+    for min_r, min_c, max_r, max_c in regions:
+        max_r = max_row if max_r is None else min(max_r, max_row)
+        max_c = max_col if max_c is None else min(max_c, max_col)
+        for row in range(min_r, max_r + 1):
+            for col in range(min_c, max_c + 1):
+                anchor = get_top_left_merged_cell_address(ws, f"{get_column_letter(col)}{row}")
+                coords.add(coordinate_to_tuple(anchor))
+    for row, col in sorted(coords):
+        yield ws.cell(row=row, column=col)
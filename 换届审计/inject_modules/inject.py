@@ -1,5 +1,5 @@
 from openpyxl import load_workbook
-from .mapping import get_mapping_conf_and_df
+from modules.mapping_cache import mapping_confs_and_dfs
 from .table1 import inject_table1
 from .table2 import inject_table2
 from .table3 import inject_table3
@@ -12,9 +12,10 @@ def run_full_injection(mapping_file, source_file, template_file, output_file, lo
     wb_tgt = load_workbook(template_file)
     ws_tgt = wb_tgt.active
 
-    conf1, df1 = get_mapping_conf_and_df(mapping_file, "inj1")
-    conf2, df2 = get_mapping_conf_and_df(mapping_file, "inj2")
-    conf3, df3 = get_mapping_conf_and_df(mapping_file, "inj3")
+    inj = mapping_confs_and_dfs(mapping_file, ["inj1", "inj2", "inj3"])
+    conf1, df1 = inj["inj1"]
+    conf2, df2 = inj["inj2"]
+    conf3, df3 = inj["inj3"]
 
     inject_table1(wb_src, ws_tgt, conf1, df1, log=log)
     inject_table2(wb_src, ws_tgt, conf2, df2, log=log)
@@ -1,15 +1,59 @@
 import pandas as pd
 
-def get_mapping_conf_and_df(mapping_file, sheet_name):
-    df = pd.read_excel(mapping_file, sheet_name=sheet_name, header=None)
+HEADER_KEYWORDS = ["起始行", "来源字段"]
+
+
+def _header_names(header_row) -> list:
+    """按 pd.read_excel(header=...) 的规则生成列名：空表头记为 'Unnamed: i'，重名依次加 '.1'、'.2'。"""
+    names, seen = [], {}
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if pd.isna(value) else value
+        if name in seen:
+            seen[name] += 1
+            deduped = f"{name}.{seen[name]}"
+            while deduped in seen:
+                seen[name] += 1
+                deduped = f"{name}.{seen[name]}"
+            seen[deduped] = 0
+            name = deduped
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def split_conf_and_df(df_raw: pd.DataFrame):
+    """
+    把一次 header=None 读出的整张Sheet，在内存中拆成两部分：
+    表头行（含“起始行”或“来源字段”）之前的 conf 键值对，以及以该行为表头的数据表。
+    结果与先找表头行、再以 header=表头行 重新 read_excel 一致。
+    """
     conf = {}
     data_start = 0
-    for i, row in df.iterrows():
+    for i, row in df_raw.iterrows():
         values = [str(cell).strip() for cell in row if pd.notna(cell)]
-        if any(k in values for k in ["起始行", "来源字段"]):
+        if any(k in values for k in HEADER_KEYWORDS):
             data_start = i
             break
         if pd.notna(row[0]) and pd.notna(row[1]):
             conf[str(row[0]).strip()] = str(row[1]).strip()
-    df_data = pd.read_excel(mapping_file, sheet_name=sheet_name, header=data_start)
-    return conf, df_data
+
+    if df_raw.empty:
+        return conf, pd.DataFrame()
+    df_data = df_raw.iloc[data_start + 1:].reset_index(drop=True)
+    df_data.columns = _header_names(df_raw.iloc[data_start])
+    return conf, df_data.infer_objects()
+
+
+def get_mapping_conf_and_df(mapping_file, sheet_name):
+    df = pd.read_excel(mapping_file, sheet_name=sheet_name, header=None)
+    return split_conf_and_df(df)
+
+
+def get_mapping_confs_and_dfs(mapping_file, sheet_names) -> dict:
+    """
+    批量版本：一次打开工作簿读出所有指定的 inj Sheet，返回 {Sheet名: (conf, df)}。
+    mapping_file 可以是路径，也可以是已经打开的 pd.ExcelFile。
+    """
+    raw_frames = pd.read_excel(mapping_file, sheet_name=list(sheet_names), header=None)
+    return {name: split_conf_and_df(raw_frames[name]) for name in sheet_names}
@@ -0,0 +1,68 @@
+# inject_modules/merged_cells.py
+"""
+合并单元格左上角定位的共享实现（原先 table1/table2/table3 各复制了一份）。
+
+每个工作表第一次查询时，把所有合并区域展开成“坐标 -> 左上角地址”的字典，
+之后每次查询都是 O(1) 的字典命中，不再为每个写入的单元格遍历全部合并区域。
+字典按工作表缓存在 WeakKeyDictionary 中，工作表释放后自动清除。
+
+合并区域的数量变化（merge_cells / unmerge_cells）时会自动重建；如果在同一张表上
+先拆分再合并了同样数量的区域，请显式调用 invalidate_merged_cells(ws)。
+"""
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+
+# ws -> (合并区域数量, {(行, 列): 左上角地址})
+_anchor_maps = WeakKeyDictionary()
+
+
+@lru_cache(maxsize=4096)
+def _to_tuple(a1_address_str: str) -> tuple:
+    return coordinate_to_tuple(a1_address_str)
+
+
+def _build_anchor_map(ws) -> dict:
+    anchors = {}
+    for merged_range in ws.merged_cells.ranges:
+        min_col, min_row, max_col, max_row = merged_range.bounds
+        top_left_address = f"{get_column_letter(min_col)}{min_row}"
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                anchors[(row, col)] = top_left_address
+    return anchors
+
+
+def _anchor_map(ws) -> dict:
+    merged_count = len(ws.merged_cells.ranges)
+    cached = _anchor_maps.get(ws)
+    if cached is None or cached[0] != merged_count:
+        cached = (merged_count, _build_anchor_map(ws))
+        _anchor_maps[ws] = cached
+    return cached[1]
+
+
+def invalidate_merged_cells(ws=None):
+    """丢弃指定工作表（不传则为全部工作表）的合并区域索引，下次查询时重建。"""
+    if ws is None:
+        _anchor_maps.clear()
+    else:
+        _anchor_maps.pop(ws, None)
+
+
+def get_top_left_merged_cell_address(ws, a1_address_str):
+    """
+    Given a worksheet and an A1-style cell address string,
+    returns the A1-style address of the top-left cell of the merged region it belongs to.
+    If the cell is not merged, returns the original address.
+    """
+    if not isinstance(a1_address_str, str) or not a1_address_str:
+        return a1_address_str
+
+    try:
+        target_coord = _to_tuple(a1_address_str)
+    except Exception as e:
+        return a1_address_str
+
+    return _anchor_map(ws).get(target_coord, a1_address_str)
@@ -0,0 +1,59 @@
+# inject_modules/style_registry.py
+"""
+报表数字格式的样式注册表。
+
+模板中的单元格各自带有字体、边框、填充，格式化时只能“叠加”数字格式和对齐，
+不能整体替换成一个 NamedStyle（否则模板字体/边框会丢失）。这里按
+“单元格原有样式 + 目标格式”缓存叠加后的 StyleArray：
+同一种原样式第一次遇到时走 openpyxl 的 number_format / alignment 赋值（会做样式哈希查找），
+之后同样原样式的单元格直接复用缓存结果，一次赋值完成，不再逐个哈希 Alignment、数字格式。
+缓存按工作簿分别保存（样式下标只在同一个工作簿内有效），工作簿释放后自动清除。
+"""
+from copy import copy
+from weakref import WeakKeyDictionary
+
+from openpyxl.styles import Alignment
+from openpyxl.styles.cell_style import StyleArray
+
+MONEY_FORMAT = '#,##0.00'
+# 汇总表：0显示为'-'
+SUMMARY_FORMAT = '#,##0.00;-#,##0.00;"-"'
+# 业务活动表：0显示为空白
+ACTIVITY_FORMAT = '#,##0.00;-#,##0.00;;@'
+# 行次列：整数
+INTEGER_FORMAT = '0'
+RIGHT_ALIGNMENT = Alignment(horizontal='right', vertical='center')
+
+# 样式名 -> (数字格式, 对齐方式)；对齐为 None 时保留单元格原有对齐
+STYLES = {
+    "money": (MONEY_FORMAT, None),
+    "summary": (SUMMARY_FORMAT, RIGHT_ALIGNMENT),
+    "activity": (ACTIVITY_FORMAT, RIGHT_ALIGNMENT),
+    "row_number": (INTEGER_FORMAT, None),
+}
+
+# wb -> {样式名: {原 StyleArray: 叠加后的 StyleArray}}
+_derived_styles = WeakKeyDictionary()
+
+
+def apply_style(cell, style_name: str):
+    """把注册表中的样式（数字格式 + 可选对齐）叠加到单元格上，保留其原有字体、边框和填充。"""
+    per_wb = _derived_styles.get(cell.parent.parent)
+    if per_wb is None:
+        per_wb = _derived_styles[cell.parent.parent] = {}
+    derived = per_wb.setdefault(style_name, {})
+
+    if not cell._style:
+        # 新建且从未设置过样式的单元格没有 StyleArray，按 openpyxl 的做法补一个默认样式
+        cell._style = StyleArray()
+    key = tuple(cell._style)
+    cached = derived.get(key)
+    if cached is not None:
+        cell._style = copy(cached)
+        return
+
+    number_format, alignment = STYLES[style_name]
+    cell.number_format = number_format
+    if alignment is not None:
+        cell.alignment = alignment
+    derived[key] = copy(cell._style)
@@ -1,31 +1,6 @@
 # File: inject_modules/table1.py
-from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
-
-def _get_top_left_merged_cell_address(ws, a1_address_str):
-    """
-    Given a worksheet and an A1-style cell address string,
-    returns the A1-style address of the top-left cell of the merged region it belongs to.
-    If the cell is not merged, returns the original address.
-    """
-    if not isinstance(a1_address_str, str) or not a1_address_str: # Added check for empty string        
-        return a1_address_str
-
-    try:
-        row, col = coordinate_to_tuple(a1_address_str)
-        target_coord = (row, col)
-    except Exception as e:        
-        return a1_address_str
-
-    for merged_range in ws.merged_cells.ranges:
-        # Check if the target cell (row, col) is within this merged range
-        if target_coord[0] >= merged_range.min_row and target_coord[0] <= merged_range.max_row and \
-           target_coord[1] >= merged_range.min_col and target_coord[1] <= merged_range.max_col:
-
-            # Get the top-left coordinates of the merged range
-            min_col, min_row, max_col, max_row = merged_range.bounds
-            top_left_address = f"{get_column_letter(min_col)}{min_row}"
-            return top_left_address
-    return a1_address_str
+from modules.sheet_grid import SheetGrid
+from inject_modules.merged_cells import get_top_left_merged_cell_address
 
 def inject_table1(wb_src, ws_tgt, conf, df_map, log=None):
     start_sheet = conf.get("start_sheet")
@@ -35,11 +10,17 @@ def inject_table1(wb_src, ws_tgt, conf, df_map, log=None):
         return
 
     try:
-        ws_src_init = wb_src[start_sheet]
-        ws_src_final = wb_src[end_sheet]
+        ws_src_init = SheetGrid.of(wb_src[start_sheet])
+        ws_src_final = SheetGrid.of(wb_src[end_sheet])
     except KeyError as e:        
         return
 
+    # Label index on column A of both sheets: one dict lookup per mapping row instead of a full scan.
+    # Fields without an exact hit are resolved together by one multi-pattern pass over the labels.
+    src_fields = [str(field).strip() for field in df_map["来源字段"]]
+    init_hits = ws_src_init.label_index().find_many(src_fields)
+    final_hits = ws_src_final.label_index().find_many(src_fields)
+
     for idx, row in df_map.iterrows():
         src_field = str(row["来源字段"]).strip()
         tgt_init_cell = str(row["目标单元格（期初）"]).strip()
@@ -57,33 +38,23 @@ def inject_table1(wb_src, ws_tgt, conf, df_map, log=None):
         val_init, val_final = None, None
         
         # Search for initial value in ws_src_init
-        found_init = False
-        for r_search in range(1, ws_src_init.max_row + 1):
-            name = ws_src_init.cell(row=r_search, column=1).value # Assuming source field is in column A (1)
-            if name and src_field in str(name):
-                val_init = ws_src_init.cell(row=r_search, column=2).value # Assuming value is in column B (2)                
-                found_init = True
-                break
-        if not found_init:
-            continue           
+        hit_init = init_hits.get(src_field)
+        if not hit_init:
+            continue
+        val_init = ws_src_init.value(hit_init[0], 2) # Assuming value is in column B (2)
 
         # Search for final value in ws_src_final
-        found_final = False
-        for r_search in range(1, ws_src_final.max_row + 1):
-            name = ws_src_final.cell(row=r_search, column=1).value # Assuming source field is in column A (1)
-            if name and src_field in str(name):
-                val_final = ws_src_final.cell(row=r_search, column=3).value # Assuming value is in column C (3)                
-                found_final = True
-                break
-        if not found_final:
-            continue            
+        hit_final = final_hits.get(src_field)
+        if not hit_final:
+            continue
+        val_final = ws_src_final.value(hit_final[0], 3) # Assuming value is in column C (3)
 
 
         # --- 写入目标单元格 ---
         try:
             # Inject initial value
             if tgt_init_cell:
-                actual_init_cell = _get_top_left_merged_cell_address(ws_tgt, tgt_init_cell)
+                actual_init_cell = get_top_left_merged_cell_address(ws_tgt, tgt_init_cell)
                 address = row.get("目标单元格（期初）") 
                 if address: 
                     ws_tgt[actual_init_cell] = val_init
@@ -91,7 +62,7 @@ def inject_table1(wb_src, ws_tgt, conf, df_map, log=None):
 
             # Inject final value
             if tgt_final_cell:
-                actual_final_cell = _get_top_left_merged_cell_address(ws_tgt, tgt_final_cell)
+                actual_final_cell = get_top_left_merged_cell_address(ws_tgt, tgt_final_cell)
                 address = row.get("目标单元格（期末）") 
                 if address: 
                     ws_tgt[actual_final_cell] = val_final
@@ -99,7 +70,7 @@ def inject_table1(wb_src, ws_tgt, conf, df_map, log=None):
 
             # Inject variance formula or value
             if var_cell:
-                actual_var_cell = _get_top_left_merged_cell_address(ws_tgt, var_cell)
+                actual_var_cell = get_top_left_merged_cell_address(ws_tgt, var_cell)
                 
                 # 【核心修复】使用 if/else 分开处理
                 if var_formula:
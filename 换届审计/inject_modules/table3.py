@@ -5,39 +5,16 @@ import pandas as pd
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+from modules.sheet_grid import SheetGrid
+from inject_modules.merged_cells import get_top_left_merged_cell_address
+from modules.mapping_cache import mapping_frame
 
 
-# 复制这个完整的函数
-def _get_top_left_merged_cell_address(ws, a1_address_str):
-    """
-    Given a worksheet and an A1-style cell address string,
-    returns the A1-style address of the top-left cell of the merged region it belongs to.
-    If the cell is not merged, returns the original address.
-    """
-    if not isinstance(a1_address_str, str) or not a1_address_str:
-        return a1_address_str
-
-    try:
-        row, col = coordinate_to_tuple(a1_address_str)
-        target_coord = (row, col)
-    except Exception as e:
-        return a1_address_str
-
-    for merged_range in ws.merged_cells.ranges:
-        if target_coord[0] >= merged_range.min_row and target_coord[0] <= merged_range.max_row and \
-           target_coord[1] >= merged_range.min_col and target_coord[1] <= merged_range.max_col:
-            
-            min_col, min_row, max_col, max_row = merged_range.bounds
-            top_left_address = f"{get_column_letter(min_col)}{min_row}"
-            return top_left_address
-
-    return a1_address_str
-
-def _get_value_from_cell(ws: Worksheet, address: str) -> float:
+def _get_value_from_cell(ws: SheetGrid, address: str) -> float:
     """安全地从指定单元格获取数值，如果为空则返回0。"""
     if not address or not isinstance(address, str):
         return 0.0
-    cell_value = ws[address].value
+    cell_value = ws[address]
     return float(cell_value) if cell_value is not None else 0.0
 
 def _apply_formulas_from_mapping(ws_tgt: Worksheet, mapping_file_path: str):
@@ -46,7 +23,7 @@ def _apply_formulas_from_mapping(ws_tgt: Worksheet, mapping_file_path: str):
     """    
     try:
         # 读取配置，并假设第一行是表头
-        df_formula = pd.read_excel(mapping_file_path, sheet_name="合计公式配置")       
+        df_formula = mapping_frame(mapping_file_path, "合计公式配置")
 
         for _, row in df_formula.iterrows():
             target_cell_address = row.get("变动单元格")
@@ -72,8 +49,8 @@ def inject_table3(wb_src: Workbook, ws_tgt: Worksheet, conf: dict, df_map, mappi
         logging.error("table3配置或源文件Sheet不完整。")
         return
 
-    ws_start = wb_src[start_sheet_name]
-    ws_end = wb_src[end_sheet_name]    
+    ws_start = SheetGrid.of(wb_src[start_sheet_name])
+    ws_end = SheetGrid.of(wb_src[end_sheet_name])
     logging.info("进入 inject_table3 函数")
 
     # --- 第一步：像以前一样，注入所有期初、期末和增减数据 ---
@@ -90,14 +67,14 @@ def inject_table3(wb_src: Workbook, ws_tgt: Worksheet, conf: dict, df_map, mappi
         # 注入期初、期末值
         original_addr_start = row.get("目标单元格（期初）")
         if original_addr_start:
-            actual_addr_start = _get_top_left_merged_cell_address(ws_tgt, original_addr_start)
+            actual_addr_start = get_top_left_merged_cell_address(ws_tgt, original_addr_start)
             cell_start = ws_tgt[actual_addr_start]
             cell_start.value = val_start
             cell_start.number_format = '#,##0.00'
 
         original_addr_end = row.get("目标单元格（期末）")
         if original_addr_end:
-            actual_addr_end = _get_top_left_merged_cell_address(ws_tgt, original_addr_end)
+            actual_addr_end = get_top_left_merged_cell_address(ws_tgt, original_addr_end)
             cell_end = ws_tgt[actual_addr_end]
             cell_end.value = val_end
             cell_end.number_format = '#,##0.00'
@@ -106,13 +83,13 @@ def inject_table3(wb_src: Workbook, ws_tgt: Worksheet, conf: dict, df_map, mappi
         if change > 0:
             original_addr_increase = row.get("增加单元格")
             if original_addr_increase: 
-                actual_addr_increase = _get_top_left_merged_cell_address(ws_tgt, original_addr_increase)
+                actual_addr_increase = get_top_left_merged_cell_address(ws_tgt, original_addr_increase)
                 ws_tgt[actual_addr_increase].value = change
                 ws_tgt[actual_addr_increase].number_format = '#,##0.00'
         elif change < 0:
             original_addr_decrease = row.get("减少单元格")
             if original_addr_decrease:
-                actual_addr_decrease = _get_top_left_merged_cell_address(ws_tgt, original_addr_decrease)
+                actual_addr_decrease = get_top_left_merged_cell_address(ws_tgt, original_addr_decrease)
                 ws_tgt[actual_addr_decrease].value = abs(change) # 写入绝对值
                 ws_tgt[actual_addr_decrease].number_format = '#,##0.00'
     # --- 调用公式注入模块 ---
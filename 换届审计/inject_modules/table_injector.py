@@ -4,7 +4,7 @@ from openpyxl.workbook import Workbook
 from inject_modules.table1 import inject_table1
 from inject_modules.table2 import inject_table2
 from inject_modules.table3 import inject_table3
-from inject_modules.mapping import get_mapping_conf_and_df
+from modules.mapping_cache import mapping_confs_and_dfs
 import logging
 
 
@@ -21,10 +21,11 @@ def populate_balance_change_sheet(wb_src: Workbook, wb_to_fill: Workbook, mappin
     ws_tgt = wb_to_fill[target_sheet_name]
     logging.info(f"成功定位到目标Sheet: '{target_sheet_name}'")
 
-    # 构造 df_map 配置
-    conf1, df1 = get_mapping_conf_and_df(mapping_file_path, "inj1")
-    conf2, df2 = get_mapping_conf_and_df(mapping_file_path, "inj2")
-    conf3, df3 = get_mapping_conf_and_df(mapping_file_path, "inj3")
+    # 构造 df_map 配置（三张 inj Sheet 一次读出）
+    inj = mapping_confs_and_dfs(mapping_file_path, ["inj1", "inj2", "inj3"])
+    conf1, df1 = inj["inj1"]
+    conf2, df2 = inj["inj2"]
+    conf3, df3 = inj["inj3"]
 
     # 注入三张表格到这个指定的Sheet
     logging.info(f"开始向 '{target_sheet_name}' Sheet注入Table 1...")
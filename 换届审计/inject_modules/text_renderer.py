@@ -5,13 +5,14 @@ from openpyxl import load_workbook
 from openpyxl.workbook import Workbook
 import pandas as pd
 import logging
+from modules.mapping_cache import mapping_frame
 
 class StrictUndefined(Undefined):
     def __str__(self):
         raise ValueError(f"Template variable '{self._undefined_name}' is not defined.")
 
 def render_text_template_from_mapping(mapping_path, summary_values, alias_dict=None):
-    df = pd.read_excel(mapping_path, sheet_name="text_mapping")
+    df = mapping_frame(mapping_path, "text_mapping")
     df_template = df[df["字段名"] == "文字模板"]
     if df_template.empty:
         logging.warning("No '文字模板' found in text_mapping sheet.")
@@ -1 +1 @@
-from .utils import normalize_name
\ No newline at end of file
+from .utils import normalize_name, strip_ordinal_prefix
\ No newline at end of file
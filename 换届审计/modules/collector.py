@@ -2,8 +2,9 @@
 
 import json
 import logging
+import os
 from openpyxl import load_workbook
-from modules.mapping_loader import load_mapping_file
+from modules.mapping_cache import load_compiled_mapping
 from inject_modules.balance_utils import get_balance_core_data
 import re
 import calendar
@@ -35,25 +36,20 @@ def get_change_direction(summary: dict):
             summary[direction_field] = "【无法计算】"
 
 def collect_summary_values(mapping_path, output_path):
+    """
+    汇总资产/负债/净资产的期初期末及增减。
+    output_path 可以是 output.xlsx 的路径，也可以是已经在内存中的工作簿数值快照（WorkbookGrid）
+    或 data_only 工作簿，此时不再从磁盘重新加载。
+    """
     summary = {}
     # ... (前面的 mapping 和 alias_dict 加载逻辑保持不变) ...
-    mapping = load_mapping_file(mapping_path)
-    raw_alias_map = mapping["subject_alias_map"]
-    alias_dict = {}
-    for std, aliases in raw_alias_map.items():
-        std_norm = std.strip()
-        if not isinstance(aliases, list): aliases = [aliases]
-        for alias in [std_norm] + aliases:
-            alias_norm = alias.strip()
-            alias_dict[alias_norm] = std_norm
-            
+    compiled = load_compiled_mapping(mapping_path)
+    mapping = compiled["mapping"]
+    alias_dict = mapping["alias_resolver"].alias_to_standard
+
     try:
-        mapping_wb = load_workbook(mapping_path, data_only=True)
-        header_ws = mapping_wb["HeaderMapping"]
-        rule_dict = {
-            row[0].value: str(row[2].value).strip() if row[2].value is not None else ""
-            for row in header_ws.iter_rows(min_row=2)
-        }
+        # HeaderMapping 的 {字段名: 规则} 已在编译缓存中准备好
+        rule_dict = compiled["header_rules"]
 
         # 提取数据，但不进行格式化
         unit_name = rule_dict.get("单位名称", "【未提取】")
@@ -71,7 +67,10 @@ def collect_summary_values(mapping_path, output_path):
         
         start_sheet = rule_dict.get("起始资产负债表Sheet")
         end_sheet = rule_dict.get("终止资产负债表Sheet")
-        wb = load_workbook(output_path, data_only=True)
+        if isinstance(output_path, (str, os.PathLike)):
+            wb = load_workbook(output_path, data_only=True)
+        else:
+            wb = output_path
         if start_sheet in wb.sheetnames and end_sheet in wb.sheetnames:
             start_data = get_balance_core_data(wb[start_sheet], mapping["blocks"], alias_dict)
             end_data = get_balance_core_data(wb[end_sheet], mapping["blocks"], alias_dict)
@@ -1,28 +1,30 @@
 from modules.utils import normalize_name
+from modules.sheet_grid import SheetGrid
 
 def fill_balance_sheet_by_name(ws_src, ws_tgt, alias_dict, log, skip_list=[]):    
-    # ✅ 提取源数据（双列 A-C 和 E-G-H）
+    # ✅ 提取源数据（双列 A-C 和 E-G-H）；ws_src 可以是工作表或已生成的 SheetGrid
+    src = SheetGrid.of(ws_src)
     src_dict = {}
-    for i in range(1, ws_src.max_row + 1):
-        name_a = ws_src[f"A{i}"].value
+    for i in range(1, src.max_row + 1):
+        name_a = src.value(i, 1)
         if name_a:
             name_std = normalize_name(alias_dict.get(str(name_a).strip(), str(name_a).strip()))
-            val_init = ws_src[f"C{i}"].value or ""
-            val_final = ws_src[f"D{i}"].value or ""
+            val_init = src.value(i, 3) or ""
+            val_final = src.value(i, 4) or ""
             src_dict[name_std] = {"期初": val_init, "期末": val_final}
 
-        name_e = ws_src[f"E{i}"].value
+        name_e = src.value(i, 5)
         if name_e:
             name_std = normalize_name(alias_dict.get(str(name_e).strip(), str(name_e).strip()))
-            val_init = ws_src[f"G{i}"].value or ""
-            val_final = ws_src[f"H{i}"].value or ""
+            val_init = src.value(i, 7) or ""
+            val_final = src.value(i, 8) or ""
             if name_std not in src_dict:
                 src_dict[name_std] = {"期初": val_init, "期末": val_final}
 
     # ✅ 提取模板字段及目标行号
     tgt_dict = {}
-    for i in range(1, ws_tgt.max_row + 1):
-        name_raw = ws_tgt[f"A{i}"].value
+    for i, row in SheetGrid.of(ws_tgt).iter_rows():
+        name_raw = row[0] if row else None
         if name_raw:
             name_std = normalize_name(str(name_raw).strip())
             tgt_dict[name_std] = i
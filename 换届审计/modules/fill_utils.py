@@ -1,13 +1,17 @@
 import logging
 from modules.match_utils import match_subject_name
+from modules.alias_resolver import AliasResolver
 def fill_balance_block(ws_src, ws_tgt, blocks, alias_map):
     """
     将资产负债表一个区块的数据从源表写入模板
     :param ws_src: openpyxl 的源数据 worksheet
     :param ws_tgt: openpyxl 的模板 worksheet
     :param block_conf: mapping_loader["blocks"][区块名]
-    :param alias_map: mapping_loader["subject_alias_map"]
+    :param alias_map: mapping_loader["alias_resolver"] 或 mapping_loader["subject_alias_map"]
     """
+    # 别名表在整个区块循环中只编译一次
+    if not isinstance(alias_map, AliasResolver):
+        alias_map = AliasResolver.from_alias_map(alias_map)
     for block_name, block_conf in blocks.items():        
         for row in ws_tgt.iter_rows(min_row=block_conf["start_row"], max_row=block_conf["end_row"]):
             tgt_row = row[0].row
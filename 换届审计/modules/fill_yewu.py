@@ -1,4 +1,5 @@
 from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from modules.sheet_grid import SheetGrid
 
 def safe_read(ws, cell_ref):
     try:
@@ -11,6 +12,8 @@ def safe_read(ws, cell_ref):
 def fill_yewu_by_mapping(ws_src, ws_tgt,yewu_line_map,prev_ws=None, net_asset_fallback=None, log=None):
     if log is not None:
         log.append("✅ fill_yewu_by_mapping 已启动")       
+    # 源表只读取数值，统一走快照；ws_src 也可以直接传入 SheetGrid
+    src = SheetGrid.of(ws_src)
     for item in yewu_line_map:
         field = item.get("字段名")
         src_initial = item.get("源期初坐标")
@@ -52,14 +55,14 @@ def fill_yewu_by_mapping(ws_src, ws_tgt,yewu_line_map,prev_ws=None, net_asset_fa
         # 正常期初值写入
         if src_initial and tgt_initial:
             try:
-                ws_tgt[tgt_initial].value = ws_src[src_initial].value
+                ws_tgt[tgt_initial].value = src[src_initial]
             except Exception as e:
                 print(f"⚠️ 期初写入失败: {field}, {e}")
 
         # 正常期末值写入
         if src_final and tgt_final:
             try:
-                ws_tgt[tgt_final].value = ws_src[src_final].value
+                ws_tgt[tgt_final].value = src[src_final]
             except Exception as e:
                 print(f"⚠️ 期末写入失败: {field}, {e}")
             if field in ["收 入 合 计", "费 用 合 计", "收支结余"]:
@@ -0,0 +1,90 @@
+# modules/keyword_matcher.py
+from collections import deque
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    多关键字“包含”匹配（Aho–Corasick 自动机）。
+
+    把一组关键字编译成一个确定性自动机，之后对任意文本只需从左到右扫描一遍，
+    就能得到其中出现的全部关键字，成本只与文本长度有关，与关键字个数无关；
+    取代逐个关键字 `keyword in text` 的 any(...) 循环。
+
+    反复使用的固定关键字组（例如 mapping 中每个区块的“跳过行”）请通过 KeywordMatcher.of(...) 获取，
+    缓存有上限；只用一次的关键字组直接 KeywordMatcher(...) 构建，不进入缓存。
+    空关键字被忽略；没有任何关键字时 search() 恒为 False。
+    """
+    __slots__ = ("patterns", "_delta", "_outputs")
+
+    def __init__(self, patterns):
+        self.patterns = tuple(dict.fromkeys(p for p in patterns if p))
+
+        # 1. 关键字逐字插入字典树；_outputs[状态] 为在该状态结束的关键字序号
+        goto, outputs = [{}], [()]
+        for i, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(())
+                state = nxt
+            outputs[state] += (i,)
+
+        # 2. 按层（BFS）计算失败链接，并把失败转移直接并入转移表，扫描时每个字符只查一次字典
+        delta = [dict(g) for g in goto]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[nxt] += outputs[fail[nxt]]
+                queue.append(nxt)
+            if state:
+                for ch, nxt in delta[fail[state]].items():
+                    delta[state].setdefault(ch, nxt)
+
+        self._delta = delta
+        self._outputs = outputs
+
+    @classmethod
+    def of(cls, patterns) -> "KeywordMatcher":
+        """按关键字元组缓存已编译的自动机（最近使用的 256 组），同一组关键字不重复编译。"""
+        return _compiled_matcher(cls, tuple(patterns))
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def _scan(self, text):
+        delta, outputs, state = self._delta, self._outputs, 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                yield outputs[state]
+
+    def search(self, text) -> bool:
+        """text 中是否出现任一关键字（等价于 any(k in text for k in patterns)）。"""
+        if not self.patterns or text is None:
+            return False
+        for _ in self._scan(str(text)):
+            return True
+        return False
+
+    def matches(self, text) -> list:
+        """text 中出现的全部关键字（去重，按首次出现时的结束位置排序）。"""
+        if not self.patterns or text is None:
+            return []
+        found = {}
+        for hits in self._scan(str(text)):
+            for i in hits:
+                found.setdefault(i, None)
+        return [self.patterns[i] for i in found]
+
+
+@lru_cache(maxsize=256)
+def _compiled_matcher(cls, patterns: tuple) -> KeywordMatcher:
+    return cls(patterns)
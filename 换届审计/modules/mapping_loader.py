@@ -1,6 +1,7 @@
 import openpyxl
 from openpyxl.utils.cell import coordinate_to_tuple, coordinate_from_string, column_index_from_string
 from openpyxl.utils import get_column_letter 
+from modules.alias_resolver import AliasResolver
 
 def get_col_index(cell):
     try:
@@ -126,6 +127,7 @@ def load_mapping_file(path):
     return {
         "blocks": blocks,
         "subject_alias_map": alias_map,
+        "alias_resolver": AliasResolver.from_alias_map(alias_map),
         "yewu_line_map": yewu_map,
         "header_meta": header_meta
     }
@@ -1,17 +1,43 @@
 """Utility helpers for modules."""
+import re
+import sys
+from functools import lru_cache
 
-def normalize_name(name: str) -> str:
+# Full-width spaces, non-breaking spaces and line breaks all fold to a regular space.
+_SPACE_FOLD = str.maketrans(dict.fromkeys("\u3000\u00A0\t\r\n", " "))
+
+# Ordinal prefixes such as "（一）", "(2)" in front of a label.
+ORDINAL_PREFIX = re.compile(r'^\s*[（(].*?[)）]\s*')
+
+
+@lru_cache(maxsize=8192)
+def _normalize(text: str, compact: bool, strip_ordinal: bool) -> str:
+    text = text.translate(_SPACE_FOLD)
+    if strip_ordinal:
+        text = ORDINAL_PREFIX.sub("", text, count=1)
+    return sys.intern(("" if compact else " ").join(text.split()))
+
+
+def normalize_name(name, compact: bool = False, strip_ordinal: bool = False) -> str:
     """Return a whitespace-normalized version of *name*.
 
     Whitespace characters like tabs, newlines, full width and non‑breaking spaces
     are replaced with regular spaces. Consecutive spaces collapse into one.
+    With ``compact=True`` all whitespace is removed instead, so Chinese labels
+    typed with spacing ("收 入 合 计") match their plain form ("收入合计").
+    With ``strip_ordinal=True`` a leading ordinal prefix like "（一）" is dropped.
+
+    Labels recur across every sheet and year, so results are memoized (bounded)
+    and returned as interned strings.
     """
-    if name is None:
-        name = ""
-    else:
-        name = str(name)
-
-    for ch in ("\u3000", "\u00A0", "\t", "\r", "\n"):
-        name = name.replace(ch, " ")
-    name = " ".join(name.split())
-    return name.strip()
+    return _normalize("" if name is None else str(name), compact, strip_ordinal)
+
+
+@lru_cache(maxsize=8192)
+def _strip_ordinal_prefix(text: str) -> str:
+    return sys.intern(ORDINAL_PREFIX.sub("", text, count=1).strip())
+
+
+def strip_ordinal_prefix(name) -> str:
+    """Drop a leading ordinal prefix and surrounding whitespace, keeping inner spacing as-is."""
+    return _strip_ordinal_prefix(str(name))
@@ -2,30 +2,31 @@
 import os
 from pathlib import Path
 from openpyxl import load_workbook
-from modules.mapping_loader import load_mapping_file
+from modules.mapping_cache import load_compiled_mapping
 from modules.fill_yewu import fill_yewu_by_mapping
 from modules.fill_balance_anchor import fill_balance_sheet_by_name
 from modules.render_header import render_header
+from modules.sheet_grid import SheetGrid
 
 from inject_modules.inject import run_full_injection
 from inject_modules.balance_utils import get_balance_core_data
 
 
-def run_main_injection():
+def run_main_injection(save_output: bool = True):
+    """
+    生成“预制件”：按年份复制并填充资产负债表、业务活动表，返回填充好的目标工作簿。
+    save_output=True 时同时保存为 output/output.xlsx（main_runner 默认直接使用内存中的工作簿，
+    只在需要检查中间结果时才保存）。
+    """
     project_root = Path(__file__).resolve().parents[1]
     mapping_path = project_root / "data" / "mapping_file.xlsx"
-    mapping = load_mapping_file(mapping_path)
+    mapping = load_compiled_mapping(mapping_path)["mapping"]
     df_yewu = mapping.get("yewu_mapping")
     #print(f"Loaded mapping keys: {mapping.keys()}") # 打印所有顶层键
     #print(f"yewu_line_map value in legacy_runner: {mapping.get('yewu_line_map')}") # 安全获取并打印 yewu_mapping 的值
 
-    alias_dict = {}
-    for std, aliases in mapping["subject_alias_map"].items():
-        std = std.strip()
-        if not isinstance(aliases, list):
-            aliases = [aliases]
-        for alias in [std] + aliases:
-            alias_dict[alias.strip()] = std
+    # 别名 -> 标准科目名，由 mapping_loader 编译好的 AliasResolver 提供
+    alias_dict = mapping["alias_resolver"].alias_to_standard
 
     wb_src_path = project_root / "data" / "soce.xlsx"
     wb_tgt_path = project_root / "data" / "t.xlsx"
@@ -34,14 +35,15 @@ def run_main_injection():
     os.makedirs(log_dir, exist_ok=True)  
 
     log_balance, log_yewu = [], []    
-    wb_src = load_workbook(wb_src_path, data_only=True)
+    # 源文件只读取数值：只读模式流式加载，每个Sheet生成一次快照
+    wb_src = load_workbook(wb_src_path, read_only=True, data_only=True)
     wb_tgt = load_workbook(wb_tgt_path,)
     prev_ws_yewu = None
 
     for sheet_name in wb_src.sheetnames:
         if "资产负债表" in sheet_name:
             year = int(sheet_name[:4])
-            ws_src = wb_src[sheet_name]
+            ws_src = SheetGrid.from_worksheet(wb_src[sheet_name])
 
             ws_balance = wb_tgt.copy_worksheet(wb_tgt["资产负债表"])
             ws_balance.title = f"{year}资产负债表"
@@ -53,7 +55,7 @@ def run_main_injection():
                 print("⚠️ mapping 中缺少 header_meta，跳过 render_header() 调用")
 
             if f"{year}业务活动表" in wb_src.sheetnames:
-                ws_src_yewu = wb_src[f"{year}业务活动表"]
+                ws_src_yewu = SheetGrid.from_worksheet(wb_src[f"{year}业务活动表"])
                 ws_yewu = wb_tgt.copy_worksheet(wb_tgt["业务活动表"])
                 ws_yewu.title = f"{year}业务活动表"          
                 
@@ -73,18 +75,22 @@ def run_main_injection():
                 render_header(wb_tgt, sheet_name=ws_yewu.title, year=year, header_meta=mapping["header_meta"])
                 prev_ws_yewu = ws_yewu
 
+    wb_src.close()
+
     for tmpl_sheet in ["资产负债表", "业务活动表"]:
         if tmpl_sheet in wb_tgt.sheetnames:
             wb_tgt.remove(wb_tgt[tmpl_sheet])
 
-    output_path = os.path.join("output", "output.xlsx")
-    # 确保删除旧文件（输出前始终清空并覆盖 output.xlsx 的内容）
-    if os.path.exists(output_path):
-        try:
-            os.remove(output_path)
-            #print(f"🗑️ 旧版 output.xlsx 已删除")
-        except Exception as e:
-            print(f"⚠️ 无法删除旧文件: {e}")
+    if save_output:
+        output_path = os.path.join("output", "output.xlsx")
+        # 确保删除旧文件（输出前始终清空并覆盖 output.xlsx 的内容）
+        if os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+                #print(f"🗑️ 旧版 output.xlsx 已删除")
+            except Exception as e:
+                print(f"⚠️ 无法删除旧文件: {e}")
 
-    wb_tgt.save(output_path)
-    #print(f"✅ 新版 output.xlsx 已保存至: {output_path}")
\ No newline at end of file
+        wb_tgt.save(output_path)
+        #print(f"✅ 新版 output.xlsx 已保存至: {output_path}")
+    return wb_tgt
\ No newline at end of file
@@ -4,13 +4,19 @@ import os
 import logging
 from pathlib import Path
 from openpyxl import load_workbook
-from openpyxl.styles import Alignment
 # 模块导入
 from modules.collector import collect_summary_values
+from modules.sheet_grid import WorkbookGrid
+from modules.stage_cache import StageCache
 from inject_modules.table_injector import populate_balance_change_sheet
 from inject_modules.text_renderer import render_text_template_from_mapping, inject_text_to_excel
 from src.legacy_runner import run_main_injection
 from inject_modules.biz import get_income_expense_summary, inject_income_expense_sheets
+from inject_modules.style_registry import apply_style
+from inject_modules.format_plan import ACTIVITY_SHEET_KEY, compile_format_plan, iter_planned_cells
+
+# 修改了报表生成逻辑时递增，使旧的阶段缓存整体失效
+STAGE_CACHE_VERSION = 1
 
 # 粘贴在 import 之后，run_main 之前
 
@@ -48,20 +54,30 @@ def setup_logging(log_dir="logs", log_file="audit_autogen.log"):
     logging.info("中央日志系统已成功配置，将同时输出到文件和终端。")
 
 
-def apply_global_formatting(wb, sheet_names):
+def _format_activity_cell(cell):
+    # B列（行次列）设为整数
+    if cell.column == 2 and isinstance(cell.value, (int, float)):
+        apply_style(cell, "row_number")
+    # 其他数字列设为“0显示为空白”
+    elif isinstance(cell.value, (int, float)) and not isinstance(cell.value, bool):
+        apply_style(cell, "activity")
+
+
+def _format_summary_cell(cell):
+    if isinstance(cell.value, (int, float)) and not isinstance(cell.value, bool):
+        apply_style(cell, "summary")
+
+
+def apply_global_formatting(wb, sheet_names, format_plan=None):
     """
     遍历指定工作表，为不同类型的Sheet应用不同的、专业的财务格式。
+    format_plan 为 compile_format_plan() 的结果时，只检查计划中登记的数值区域；
+    未提供计划、或Sheet不在计划中时，逐格探测整张表。
     """
-    # 为汇总表定义的格式：0显示为'-'
-    summary_format = '#,##0.00;-#,##0.00;"-"'
-    # 为业务活动表定义的格式：0显示为空白
-    activity_format = '#,##0.00;-#,##0.00;;@'
-    # 为行次列定义的整数格式
-    integer_format = '0'
-    right_alignment = Alignment(horizontal='right', vertical='center')
-    
+    # 数字格式与对齐统一由样式注册表提供：summary(0显示为'-')、activity(0显示为空白)、row_number(行次整数)
     logging.info(f"开始对Sheet列表应用智能全局数字格式...")
-    
+    format_plan = format_plan or {}
+
     for sheet_name in sheet_names:
         if sheet_name not in wb.sheetnames:
             logging.warning(f"应用全局格式化时，未找到名为'{sheet_name}'的Sheet，已跳过。")
@@ -79,27 +95,32 @@ def apply_global_formatting(wb, sheet_names):
         # 2. 如果是业务活动表，应用特殊规则
         elif "业务活动表" in sheet_name:
             logging.info(f"  -> 为'{sheet_name}'应用业务活动表格式规则...")
-            for row in ws.iter_rows():
-                for cell in row:
-                    # B列（行次列）设为整数
-                    if cell.column == 2 and isinstance(cell.value, (int, float)):
-                        cell.number_format = integer_format
-                    # 其他数字列设为“0显示为空白”
-                    elif isinstance(cell.value, (int, float)) and not isinstance(cell.value, bool):
-                        cell.number_format = activity_format
-                        cell.alignment = right_alignment
+            regions = format_plan.get(ACTIVITY_SHEET_KEY)
+            format_cell = _format_activity_cell
 
         # 3. 如果是其他表（即我们的汇总表），应用标准汇总格式
         else:
             logging.info(f"  -> 为'{sheet_name}'应用标准汇总格式规则...")
-            for row in ws.iter_rows():
-                for cell in row:
-                    if isinstance(cell.value, (int, float)) and not isinstance(cell.value, bool):
-                        cell.number_format = summary_format
-                        cell.alignment = right_alignment
+            regions = format_plan.get(sheet_name)
+            format_cell = _format_summary_cell
+
+        if regions is None:
+            cells = (cell for row in ws.iter_rows() for cell in row)
+        else:
+            cells = iter_planned_cells(ws, regions)
+        for cell in cells:
+            format_cell(cell)
 
 
-def run_main():
+def run_main(save_intermediate: bool = False, reuse_intermediate: bool = False, use_cache: bool = True):
+    """
+    一次进程内完成“预制件生成 -> 数据收集 -> 注入 -> 格式化 -> 保存”。
+    填充好的工作簿直接在内存中传递，取数用它的数值快照，不再把 output.xlsx 保存后反复加载。
+      save_intermediate  同时保存中间文件 output/output.xlsx，便于排查问题
+      reuse_intermediate 已有 output/output.xlsx 时直接使用它（例如手工修改过预制件），不重新生成
+      use_cache          源文件、模板、mapping 的内容都未变化且上次的 final_report.xlsx 仍在时，直接跳过整个流程
+                         （运行清单保存在当前用户的缓存目录，见 modules/stage_cache.py；要求保存中间文件时总是重新生成）
+    """
     setup_logging()
     # --- 1. 文件路径设置 ---
     project_root = Path(__file__).resolve().parents[1]
@@ -110,21 +131,32 @@ def run_main():
     os.makedirs(project_root / "output", exist_ok=True)
     logging.info("报表生成流程开始...")
 
-    # --- 2. 确保"预制件"存在 ---
-    if not source_path.exists():
-        logging.info(f"{source_path} 未找到，首先运行 legacy_runner 生成...")
-        run_main_injection()
-        if not source_path.exists():
-            logging.error(f"运行 legacy_runner 后仍未找到 {source_path}，终止执行。")
-            return
-
-    # --- 3. 加载"预制件" ---
-    wb_final = load_workbook(source_path)
-    wb_src_readonly = load_workbook(source_path, data_only=True)
+    # 最终报告的全部输入：mapping + 预制件的来源（已有预制件，或源数据与模板）
+    use_existing_prefab = reuse_intermediate and source_path.exists()
+    if use_existing_prefab:
+        report_inputs = [mapping_path, source_path]
+    else:
+        report_inputs = [mapping_path, project_root / "data" / "soce.xlsx", project_root / "data" / "t.xlsx"]
+    cache = StageCache(project_root, enabled=use_cache and not save_intermediate,
+                       version=STAGE_CACHE_VERSION, log=logging.log)
+    if cache.artifact_is_fresh("report", final_path, files=report_inputs):
+        logging.info(f"✅ 输入未变化，报表无需重新生成：{final_path}")
+        return
+
+    # --- 2 & 3. 准备"预制件"及其数值快照 ---
+    if use_existing_prefab:
+        logging.info(f"使用已有的预制件: {source_path}")
+        wb_final = load_workbook(source_path)
+        wb_src_readonly = load_workbook(source_path, data_only=True)
+    else:
+        logging.info("运行 legacy_runner 生成预制件（内存中传递）...")
+        wb_final = run_main_injection(save_output=save_intermediate)
+        # 与保存后以 data_only 重新加载等价：公式读作 None，其余为写入的数值
+        wb_src_readonly = WorkbookGrid.from_workbook(wb_final, formulas_as_none=True)
 
     # --- 4. 核心数据收集与计算 ---
     logging.info("步骤 1: 提取原始 summary_values...")
-    summary_values = collect_summary_values(mapping_path, source_path)
+    summary_values = collect_summary_values(mapping_path, wb_src_readonly)
     
     logging.info("步骤 2: 计算原始收支汇总...")
     income_df, expense_df, biz_summary = get_income_expense_summary(wb_src_readonly, str(mapping_path))
@@ -160,12 +192,13 @@ def run_main():
             if sheet.title not in sheets_to_format:
                 sheets_to_format.append(sheet.title)
                 
-    apply_global_formatting(wb_final, sheets_to_format)
+    apply_global_formatting(wb_final, sheets_to_format, compile_format_plan(mapping_path))
     
     # --- 8. 另存为最终报告 ---
     try:
         wb_final.save(final_path)
         logging.info(f"✅ 报表已完成，所有内容已写入：{final_path}")
+        cache.record_artifact("report", final_path, files=report_inputs)
     except Exception as e:
         logging.error(f"保存最终报告 {final_path} 时出错: {e}")
 
@@ -7,8 +7,17 @@ from src.legacy_runner import run_legacy_extraction
 from src.data_processor import pivot_and_clean_data, calculate_summary_values
 from src.data_validator import run_all_checks
 from modules.mapping_loader import load_mapping_file # 复核模块需要配置信息
+from modules.stage_cache import StageCache
 
-def run_audit_report():
+# 修改了某个阶段的计算逻辑时递增，使旧的阶段缓存整体失效
+STAGE_CACHE_VERSION = 2
+
+def run_audit_report(parallel_years=False, use_cache=True, fact_store=None):
+    """
+    parallel_years=True 时按年度并行提取源文件中的各年报表（适合跨多年的换届审计文件）。
+    use_cache=True 时各阶段按输入内容缓存在当前用户的缓存目录中（见 modules/stage_cache.py），输入未变化的阶段直接复用上次的结果。
+    fact_store 为事实库目录时，提取结果同时写入该目录下的 Parquet 事实库（见 modules.fact_store）。
+    """
     logger.info("========================================")
     logger.info("===    自动化审计报告生成流程启动    ===")
     logger.info("========================================")
@@ -19,10 +28,13 @@ def run_audit_report():
     
     logger.info(f"源文件路径: {source_file}")
     logger.info(f"映射文件路径: {mapping_file}")
+    cache = StageCache(project_root, enabled=use_cache,
+                       version=STAGE_CACHE_VERSION, log=logger.log)
 
     # --- 步骤 1/4: 数据提取 ---
     logger.info("\n--- [步骤 1/4] 执行数据提取 ---")
-    raw_df = run_legacy_extraction(source_file, mapping_file)
+    raw_df = cache.run("extract", lambda: run_legacy_extraction(source_file, mapping_file, parallel=parallel_years, fact_store=fact_store),
+                       files=[source_file, mapping_file])
     if raw_df is None or raw_df.empty:
         return
 
@@ -30,12 +42,12 @@ def run_audit_report():
 
     # --- 步骤 2/4: 数据处理与计算 ---
     logger.info("\n--- [步骤 2/4] 执行数据处理与计算 ---")
-    pivoted_normal_df, pivoted_total_df = pivot_and_clean_data(raw_df)
+    pivoted_normal_df, pivoted_total_df = cache.run("pivot", lambda: pivot_and_clean_data(raw_df), deps=["extract"])
     if pivoted_total_df is None or pivoted_total_df.empty:
         return
     logger.info("✅ 数据透视与清理成功！")
         
-    final_summary_dict = calculate_summary_values(pivoted_total_df, raw_df)
+    final_summary_dict = cache.run("summary", lambda: calculate_summary_values(pivoted_total_df, raw_df), deps=["extract", "pivot"])
     if not final_summary_dict:
         return
     logger.info("✅ 最终汇总指标计算成功！")
@@ -43,8 +55,11 @@ def run_audit_report():
     # --- 步骤 3/4: 执行数据复核 ---
     logger.info("\n--- [步骤 3/4] 执行数据复核 ---")
     # 我们需要加载mapping文件来为复核提供规则
-    full_mapping = load_mapping_file(mapping_file)
-    verification_results = run_all_checks(pivoted_normal_df, pivoted_total_df, raw_df, full_mapping)
+    verification_results = cache.run(
+        "checks",
+        lambda: run_all_checks(pivoted_normal_df, pivoted_total_df, raw_df, load_mapping_file(mapping_file)),
+        files=[mapping_file], deps=["extract", "pivot"],
+    )
     logger.info("✅ 数据复核完成！")
 
     # --- 步骤 4/4: 展示最终结果 ---
@@ -2,49 +2,46 @@
 import re
 import pandas as pd
 from src.utils.logger_config import logger
+from modules.sheet_grid import SheetGrid
+from modules.alias_resolver import AliasResolver
+from modules.fact_table import FactTableBuilder
 
-def process_balance_sheet(ws_src, sheet_name, blocks_df, alias_map_df):
+def process_balance_sheet(ws_src, sheet_name, blocks_df, alias_resolver):
     """
     【回溯版 - 忠于原始逻辑】
     模拟 fill_balance_anchor.py 的“全局扫描，字典匹配”算法。
+    alias_resolver 由 mapping_loader 编译一次，所有年度的Sheet共用；
+    为兼容旧调用，也可以直接传入“科目等价映射”的 DataFrame。
+    返回 FactTableBuilder：每个科目一条“期初”、一条“期末”事实。
     """
     logger.info(f"--- 开始处理资产负债表: '{sheet_name}' (使用'全局扫描'逻辑) ---")
 
-    alias_lookup = {}
-    if alias_map_df is not None and not alias_map_df.empty:
-        for _, row in alias_map_df.iterrows():
-            standard = str(row['标准科目名']).strip()
-            for col in alias_map_df.columns:
-                if '等价科目名' in col and pd.notna(row[col]):
-                    aliases = [alias.strip() for alias in str(row[col]).split(',')]
-                    for alias in aliases:
-                        if alias: alias_lookup[alias] = standard
+    if not isinstance(alias_resolver, AliasResolver):
+        alias_resolver = AliasResolver.from_dataframe(alias_resolver)
+    alias_lookup = alias_resolver.alias_to_standard
 
+    src = SheetGrid.of(ws_src)
     src_dict = {}
-    for i in range(1, ws_src.max_row + 1):
-        name_a = ws_src[f"A{i}"].value
+    for i in range(1, src.max_row + 1):
+        name_a = src.value(i, 1)
         if name_a and str(name_a).strip():
             name_std = alias_lookup.get(str(name_a).strip(), str(name_a).strip())
-            src_dict[name_std] = {"期初": ws_src[f"C{i}"].value, "期末": ws_src[f"D{i}"].value}
+            src_dict[name_std] = {"期初": src.value(i, 3), "期末": src.value(i, 4)}
 
-        name_e = ws_src[f"E{i}"].value
+        name_e = src.value(i, 5)
         if name_e and str(name_e).strip():
             name_std = alias_lookup.get(str(name_e).strip(), str(name_e).strip())
             if name_std not in src_dict:
-                 src_dict[name_std] = {"期初": ws_src[f"G{i}"].value, "期末": ws_src[f"H{i}"].value}
+                 src_dict[name_std] = {"期初": src.value(i, 7), "期末": src.value(i, 8)}
     
-    records = []
+    facts = FactTableBuilder()
     year = (re.search(r'(\d{4})', sheet_name) or [None, "未知"])[1]
 
+    total_subjects = {'资产总计', '负债合计', '净资产合计', '流动资产合计', '非流动资产合计', '流动负债合计', '非流动负债合计'}
     for subject_name, values in src_dict.items():
-        total_subjects = ['资产总计', '负债合计', '净资产合计', '流动资产合计', '非流动资产合计', '流动负债合计', '非流动负债合计']
         subject_type = '合计' if subject_name in total_subjects else '普通'
+        facts.add(sheet_name, "资产负债表", year, subject_name, subject_type, "期初", values["期初"])
+        facts.add(sheet_name, "资产负债表", year, subject_name, subject_type, "期末", values["期末"])
 
-        records.append({
-            "来源Sheet": sheet_name, "报表类型": "资产负债表", "年份": year,
-            "项目": subject_name, "科目类型": subject_type,
-            "期初金额": values["期初"], "期末金额": values["期末"]
-        })
-        
-    logger.info(f"--- 资产负债表 '{sheet_name}' 处理完成，生成 {len(records)} 条记录。---")
-    return records
\ No newline at end of file
+    logger.info(f"--- 资产负债表 '{sheet_name}' 处理完成，生成 {len(src_dict)} 条记录。---")
+    return facts
\ No newline at end of file
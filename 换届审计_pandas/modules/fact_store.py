@@ -0,0 +1,130 @@
+# /modules/fact_store.py
+"""
+提取结果（事实表）的 Parquet 存储。
+
+目录结构按 单位 / 来源哈希 / 年份 分区（hive 风格，可被 pyarrow、DuckDB 等直接读取）：
+    <root>/单位=<单位>/source=<来源哈希>/年份=<年份>/*.parquet
+来源哈希由源工作簿和 mapping 的内容共同决定，二者任一变化都会写入新的分区，
+同一单位旧的来源分区在写入新分区后删除，因此每个单位只保留与当前输入对应的一份事实。
+
+重新加载时只读 Parquet，不再用 openpyxl 解析 xlsx；category 列以字典编码存储，读回后仍是 category。
+需要可选依赖 pyarrow，未安装时调用会抛出 ImportError。
+"""
+import hashlib
+import os
+import shutil
+import uuid
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+from modules.fact_table import FACT_COLUMNS, PERIODS
+from modules.mapping_cache import file_digest
+from src.utils.logger_config import logger
+
+_PARTITION_COLUMNS = ["单位", "source", "年份"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("事实库（Parquet）需要安装 pyarrow：pip install pyarrow") from e
+
+
+def fact_store_key(source_path, mapping_path) -> str:
+    """来源哈希：源工作簿与 mapping 内容摘要的组合（取前16位）。"""
+    combined = f"{file_digest(source_path)}:{file_digest(mapping_path)}"
+    return hashlib.sha256(combined.encode("ascii")).hexdigest()[:16]
+
+
+def _entity_dir(root, entity) -> str:
+    # 分区值按 URI 编码，读取时 hive 分区会自动解码，单位名称中可以包含 '/'、'=' 等字符
+    return os.path.join(os.fspath(root), f"单位={quote(str(entity), safe='')}")
+
+
+def has_facts(root, entity, key) -> bool:
+    return os.path.isdir(os.path.join(_entity_dir(root, entity), f"source={key}"))
+
+
+def write_facts(root, facts: pd.DataFrame, key: str):
+    """
+    把一个单位的事实表写入事实库（按年份分区），并删除该单位旧的来源分区。
+    先写到 <root>/.tmp 下再整体改名，读取方不会看到写了一半的分区。
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    entities = facts["单位"].unique()
+    if len(entities) != 1:
+        raise ValueError(f"write_facts 每次只写入一个单位，实际为: {list(entities)}")
+    entity = entities[0]
+
+    root = os.fspath(root)
+    tmp_dir = os.path.join(root, ".tmp", uuid.uuid4().hex)
+    table = pa.Table.from_pandas(facts.drop(columns=["单位"]), preserve_index=False)
+    pq.write_to_dataset(table, root_path=tmp_dir, partition_cols=["年份"])
+
+    entity_dir = _entity_dir(root, entity)
+    target_dir = os.path.join(entity_dir, f"source={key}")
+    os.makedirs(entity_dir, exist_ok=True)
+    if os.path.isdir(target_dir):
+        shutil.rmtree(target_dir)
+    os.replace(tmp_dir, target_dir)
+    try:
+        os.rmdir(os.path.dirname(tmp_dir))
+    except OSError:
+        pass  # 其他进程正在写入
+    for name in os.listdir(entity_dir):
+        if name != f"source={key}":
+            shutil.rmtree(os.path.join(entity_dir, name), ignore_errors=True)
+    logger.info(f"✅ 单位 '{entity}' 的 {len(facts)} 条事实已写入事实库: {target_dir}")
+
+
+def load_facts(root, entities=None, years=None, key=None) -> pd.DataFrame:
+    """
+    从事实库读取事实表，列与 run_legacy_extraction 的输出一致。
+    entities / years 为需要的单位 / 年份列表（None 表示全部），只读取匹配的分区；
+    key 给定时只读取该来源哈希的分区。
+    事实库目录尚不存在（还没有运行过提取）时返回只有列名的空表。
+    """
+    if not os.path.isdir(os.fspath(root)):
+        logger.warning(f"⚠️ 事实库 {os.fspath(root)} 尚不存在，请先运行提取（--fact-store）写入事实库")
+        return pd.DataFrame(columns=FACT_COLUMNS)
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    partitioning = ds.partitioning(
+        pa.schema([(name, dictionary) for name in _PARTITION_COLUMNS]), flavor="hive", dictionaries="infer"
+    )
+    dataset = ds.dataset(os.fspath(root), format="parquet", partitioning=partitioning)
+
+    condition = None
+    for name, values in (("单位", entities), ("年份", years), ("source", [key] if key else None)):
+        if values is None:
+            continue
+        clause = ds.field(name).isin([str(v) for v in values])
+        condition = clause if condition is None else condition & clause
+
+    facts = dataset.to_table(filter=condition).to_pandas()
+    if facts.empty:
+        return pd.DataFrame(columns=FACT_COLUMNS)
+    facts = facts[FACT_COLUMNS].reset_index(drop=True)
+    for name in FACT_COLUMNS:
+        if name != "金额" and not isinstance(facts[name].dtype, pd.CategoricalDtype):
+            facts[name] = facts[name].astype("category")
+    facts["期间"] = facts["期间"].cat.set_categories(PERIODS)
+    return facts
+
+
+def list_entities(root) -> list:
+    """事实库中已有的单位名称（按名称排序）。"""
+    root = os.fspath(root)
+    if not os.path.isdir(root):
+        return []
+    return sorted(unquote(name[len("单位="):]) for name in os.listdir(root) if name.startswith("单位="))
@@ -0,0 +1,84 @@
+# /modules/fact_table.py
+"""
+提取结果的统一模型：长格式“事实表”。
+
+每条事实是 (单位, 来源Sheet, 年份, 报表类型, 项目, 科目类型, 期间, 金额) 一行：
+  - 资产负债表的一个科目产生 期初 / 期末 两条事实；
+  - 业务活动表的一个项目产生 上期 / 本期 两条事实。
+除金额（float64，无法识别的数值按 0 处理）外，各列都是 category 类型，
+同一个项目名、年份、报表类型在整张表里只存一份，筛选和透视都是按编码的向量化比较。
+
+提取时由 FactTableBuilder 按列累积（每列一个 list），不为每条记录分配 dict，
+最后一次性转换成 DataFrame。
+"""
+import pandas as pd
+
+FACT_COLUMNS = ["单位", "来源Sheet", "年份", "报表类型", "项目", "科目类型", "期间", "金额"]
+PERIODS = ["期初", "期末", "上期", "本期"]
+
+_BUILDER_COLUMNS = FACT_COLUMNS[1:]
+
+
+class FactTableBuilder:
+    """
+    事实表的列式累加器。一个 Sheet（或一个年度）一个 builder，
+    最后按需要的顺序 extend 到同一个 builder 上再 to_frame()。
+    """
+    __slots__ = ("_columns",)
+
+    def __init__(self):
+        self._columns = {name: [] for name in _BUILDER_COLUMNS}
+
+    def __len__(self):
+        return len(self._columns["金额"])
+
+    def add(self, sheet_name, statement, year, item, item_type, period, amount):
+        """追加一条事实；amount 保留原始值，转换为数值在 to_frame() 时统一向量化完成。"""
+        columns = self._columns
+        columns["来源Sheet"].append(sheet_name)
+        columns["年份"].append(year)
+        columns["报表类型"].append(statement)
+        columns["项目"].append(item)
+        columns["科目类型"].append(item_type)
+        columns["期间"].append(period)
+        columns["金额"].append(amount)
+
+    def extend(self, other: "FactTableBuilder"):
+        for name, values in other._columns.items():
+            self._columns[name].extend(values)
+
+    def amount_total(self, item, period) -> float:
+        """某项目某期间的金额合计（无法识别的数值按 0 处理）。"""
+        columns = self._columns
+        matched = [
+            amount
+            for name, p, amount in zip(columns["项目"], columns["期间"], columns["金额"])
+            if name == item and p == period
+        ]
+        return pd.to_numeric(pd.Series(matched, dtype=object), errors="coerce").sum()
+
+    def to_frame(self, entity: str = "") -> pd.DataFrame:
+        columns = self._columns
+        n = len(self)
+        data = {"单位": pd.Categorical([entity] * n)}
+        for name in _BUILDER_COLUMNS:
+            if name == "金额":
+                amounts = pd.to_numeric(pd.Series(columns[name], dtype=object), errors="coerce")
+                data[name] = amounts.fillna(0).astype("float64").to_numpy()
+            elif name == "期间":
+                data[name] = pd.Categorical(columns[name], categories=PERIODS)
+            else:
+                data[name] = pd.Categorical(columns[name])
+        return pd.DataFrame(data, columns=FACT_COLUMNS)
+
+
+def select_facts(facts: pd.DataFrame, statement=None, period=None, item_type=None) -> pd.DataFrame:
+    """按报表类型 / 期间 / 科目类型筛选事实（None 表示不限）。"""
+    mask = pd.Series(True, index=facts.index)
+    if statement is not None:
+        mask &= facts["报表类型"] == statement
+    if period is not None:
+        mask &= facts["期间"] == period
+    if item_type is not None:
+        mask &= facts["科目类型"] == item_type
+    return facts[mask]
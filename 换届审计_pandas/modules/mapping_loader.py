@@ -3,6 +3,8 @@ import pandas as pd
 import openpyxl
 from openpyxl.utils.cell import coordinate_to_tuple, column_index_from_string
 from src.utils.logger_config import logger
+from modules.alias_resolver import AliasResolver
+from modules.mapping_cache import load_compiled
 
 def get_col_index(cell):
     """从'C'或'C5'中安全地提取列索引。忠于原始逻辑。"""
@@ -53,6 +55,17 @@ def load_full_mapping_as_df(mapping_path):
         return {name: pd.DataFrame() for name in sheets_to_load}
 
 def load_mapping_file(path):
+    """
+    加载 mapping_file：文件内容未变化时直接返回编译缓存，否则调用 _parse_mapping_file 重新解析。
+    返回的结构在多处共享，调用方只读。
+    """
+    try:
+        return load_compiled(path, _parse_mapping_file)
+    except FileNotFoundError:
+        logger.error(f"映射文件未找到: {path}")
+        return {}
+
+def _parse_mapping_file(path):
     """
     【最终版 - 忠于原始逻辑】
     使用openpyxl精确解析mapping_file，返回与原始脚本完全一致的数据结构。
@@ -96,13 +109,25 @@ def load_mapping_file(path):
         # ... (保留您原始的header_meta解析逻辑或简化)
         pass
     
+    # 5. 解析可选的 "复核规则"（没有时复核使用内置规则）
+    verification_rules = []
+    if "复核规则" in wb.sheetnames:
+        rules_df = pd.read_excel(path, sheet_name="复核规则").dropna(how="all")
+        verification_rules = [
+            {k: v for k, v in row.items() if not pd.isna(v)}
+            for row in rules_df.to_dict("records")
+            if not pd.isna(row.get("规则类型"))
+        ]
+
     logger.info("--- mapping_file.xlsx 解析完成 ---")
     
-    # 5. 返回与新流程兼容的数据结构
+    # 6. 返回与新流程兼容的数据结构
     # 我们将原始的、更精确的解析结果传递给新模块使用
     return {
         "blocks_df": pd.DataFrame.from_dict(blocks, orient='index'),
         "alias_map_df": alias_map_df,
+        "alias_resolver": AliasResolver.from_dataframe(alias_map_df),
         "yewu_line_map": yewu_map,
-        "header_meta": header_meta # 保留
+        "header_meta": header_meta, # 保留
+        "verification_rules": verification_rules,
     }
\ No newline at end of file
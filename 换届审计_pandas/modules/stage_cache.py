@@ -0,0 +1,226 @@
+"""
+按内容哈希的阶段缓存（运行清单）。
+
+一次运行分为若干阶段（提取 -> 透视 -> 汇总 -> 复核 ...），每个阶段声明自己的输入：
+  - files：直接读取的文件（源工作簿、mapping、模板），按文件内容的 sha256 计算指纹；
+  - deps ：依赖的上游阶段，按上游“输出内容”的 sha256 计算指纹。
+所有输入指纹合成该阶段的键，连同输出的摘要一起记在 run_manifest.json 中，
+输出本身序列化为 <阶段名>.pkl。
+清单和输出都写在当前用户自己的缓存目录（CACHE_DIR）下、按项目目录的哈希分开，
+不放进项目（可能共享、会被整体拷走的）目录；每个输出文件以一个小文件头开头
+（版本、阶段名、阶段键、载荷摘要），文件头与清单核对一致后才反序列化后面的载荷。
+再次运行时键未变化的阶段直接加载上次的输出，不再计算。
+
+因为下游依赖的是上游输出的内容而不是上游的键，mapping 改了一个标签后：
+上游重新计算，但如果输出与上次完全一致，下游阶段仍然命中缓存（只有受影响的阶段重算）。
+
+修改了某个阶段的计算逻辑时请递增调用方传入的 version，使旧的清单整体失效。
+
+三个流程（annual_audit、换届审计、换届审计_pandas）各带一份本文件，三份逐字节相同，修改时请同步；
+流程之间的差异（版本号、输出方式 print / logging / logger）都由调用方通过参数传入。
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+MANIFEST_NAME = "run_manifest.json"
+OUTPUT_MAGIC = b"AUDIT-STAGE-CACHE\n"
+# 缓存根目录：Windows 为 %LOCALAPPDATA%，其余系统为 $XDG_CACHE_HOME 或 ~/.cache
+CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "audit_stage_cache",
+)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path) -> str:
+    """返回文件内容的 sha256 十六进制摘要。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    用法：
+        cache = StageCache(project_dir)
+        raw_df = cache.run("extract", lambda: extract(...), files=[source_file, mapping_file])
+        pivots = cache.run("pivot", lambda: pivot(raw_df), deps=["extract"])
+    project_dir 为项目目录，只用来区分不同项目的缓存，缓存本身写在 CACHE_DIR/<项目目录哈希>/ 下；
+    enabled=False 时每个阶段都重新计算，也不读写清单（结果与不使用缓存完全一致）。
+    version 为缓存版本号，与清单中记录的不一致时整个清单作废；
+    log(level, message) 用于输出提示，level 为 logging.INFO / logging.WARNING，默认写入 logging。
+    """
+
+    def __init__(self, project_dir, enabled: bool = True, version: int = 1, log=None):
+        project_key = _sha256(os.path.abspath(os.fspath(project_dir)).encode("utf-8"))[:32]
+        self.cache_dir = os.path.join(CACHE_DIR, project_key)
+        self.enabled = enabled
+        self.version = version
+        self._log = log if log is not None else logging.log
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        self._manifest = self._load_manifest() if enabled else self._empty_manifest()
+        # 本次运行中已计算过的文件指纹、各阶段输出摘要
+        self._file_digests = {}
+        self._output_digests = {}
+
+    # ---------- 清单读写 ----------
+
+    def _empty_manifest(self) -> dict:
+        return {"version": self.version, "stages": {}}
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return self._empty_manifest()
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 运行清单 {self.manifest_path} 无法读取，所有阶段将重新计算: {e}")
+            return self._empty_manifest()
+        if not isinstance(manifest, dict) or manifest.get("version") != self.version or not isinstance(manifest.get("stages"), dict):
+            return self._empty_manifest()
+        return manifest
+
+    def _save_manifest(self):
+        tmp_file = f"{self.manifest_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.manifest_path)
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 运行清单写入失败（不影响本次运行）: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    # ---------- 指纹 ----------
+
+    def _file_digest(self, path) -> str:
+        path = os.path.abspath(os.fspath(path))
+        if path not in self._file_digests:
+            self._file_digests[path] = file_digest(path)
+        return self._file_digests[path]
+
+    def _stage_key(self, files, deps):
+        """返回 (键, 输入明细)；输入明细写入清单，便于排查是哪个输入发生了变化。"""
+        inputs = {os.path.abspath(os.fspath(path)): self._file_digest(path) for path in files}
+        for name in deps:
+            if name not in self._output_digests:
+                raise KeyError(f"阶段依赖 '{name}' 尚未执行")
+            inputs[f"阶段:{name}"] = self._output_digests[name]
+        key = _sha256(json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return key, inputs
+
+    def _fresh_entry(self, name: str, key: str):
+        entry = self._manifest["stages"].get(name)
+        if self.enabled and entry and entry.get("key") == key:
+            return entry
+        return None
+
+    # ---------- 数据阶段 ----------
+
+    def _read_output(self, name: str, entry):
+        """先读文件头与清单核对版本、阶段名、阶段键和载荷摘要，全部一致才反序列化载荷。"""
+        try:
+            with open(os.path.join(self.cache_dir, f"{name}.pkl"), "rb") as f:
+                if f.readline(len(OUTPUT_MAGIC)) != OUTPUT_MAGIC:
+                    return None
+                header = json.loads(f.readline(4096))
+                expected = {"version": self.version, "stage": name, "key": entry.get("key"), "output": entry.get("output")}
+                if header != expected:
+                    return None
+                payload = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 阶段 '{name}' 的缓存无法读取，将重新计算: {e}")
+            return None
+        if _sha256(payload) != entry.get("output"):
+            return None
+        try:
+            return (pickle.loads(payload),)
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 阶段 '{name}' 的缓存无法读取，将重新计算: {e}")
+            return None
+
+    def run(self, name: str, compute_fn, files=(), deps=()):
+        """
+        执行一个阶段：输入未变化时返回上次的输出，否则调用 compute_fn() 计算并写回缓存。
+        输出需可 pickle；返回值在两种情况下等价。
+        compute_fn 返回 None（阶段失败）时不写缓存，下次运行会重新计算。
+        """
+        key, inputs = self._stage_key(files, deps)
+        entry = self._fresh_entry(name, key)
+        if entry is not None:
+            cached = self._read_output(name, entry)
+            if cached is not None:
+                self._output_digests[name] = entry["output"]
+                self._log(logging.INFO, f"⚡ 阶段 '{name}' 的输入未变化，已从缓存加载上次的结果")
+                return cached[0]
+
+        data = compute_fn()
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        output_digest = _sha256(payload)
+        self._output_digests[name] = output_digest
+        if self.enabled and data is not None:
+            self._write_output(name, key, inputs, output_digest, payload)
+        return data
+
+    def _write_output(self, name, key, inputs, output_digest, payload):
+        file_name = f"{name}.pkl"
+        cache_file = os.path.join(self.cache_dir, file_name)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        header = {"version": self.version, "stage": name, "key": key, "output": output_digest}
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            with open(tmp_file, "wb") as f:
+                f.write(OUTPUT_MAGIC)
+                f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.write(payload)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 阶段 '{name}' 的缓存写入失败（不影响本次运行）: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return
+        self._manifest["stages"][name] = {"key": key, "inputs": inputs, "output": output_digest, "file": file_name}
+        self._save_manifest()
+
+    # ---------- 文件产物阶段 ----------
+
+    def artifact_is_fresh(self, name: str, output_path, files=(), deps=()) -> bool:
+        """
+        输出为文件的阶段（例如最终报告）：输入未变化、且输出文件仍是上次生成的那一份时返回 True，
+        调用方可直接跳过该阶段。
+        """
+        key, _ = self._stage_key(files, deps)
+        entry = self._fresh_entry(name, key)
+        if entry is None or not os.path.exists(output_path):
+            return False
+        if file_digest(output_path) != entry.get("output"):
+            return False
+        self._output_digests[name] = entry["output"]
+        self._log(logging.INFO, f"⚡ 阶段 '{name}' 的输入未变化，保留上次生成的 {output_path}")
+        return True
+
+    def record_artifact(self, name: str, output_path, files=(), deps=()):
+        """文件产物生成完毕后登记到清单中。"""
+        key, inputs = self._stage_key(files, deps)
+        output_digest = file_digest(output_path)
+        self._output_digests[name] = output_digest
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        except Exception as e:
+            self._log(logging.WARNING, f"⚠️ 阶段 '{name}' 的缓存写入失败（不影响本次运行）: {e}")
+            return
+        self._manifest["stages"][name] = {"key": key, "inputs": inputs, "output": output_digest, "file": os.fspath(output_path)}
+        self._save_manifest()
@@ -0,0 +1,226 @@
+# /src/batch_runner.py
+"""
+批量模式：一次处理多个单位（多个源工作簿），共用同一份 mapping。
+
+用法：
+    python src/batch_runner.py <源文件目录 或 清单文件> [--mapping data/mapping_file.xlsx]
+                               [--workers 4] [--output output/batch_summary.xlsx]
+                               [--fact-store output/fact_store]
+    python src/batch_runner.py --from-store output/fact_store [--mapping ...] [--output ...]
+
+- 源文件目录：目录下所有 .xlsx（忽略 Excel 临时文件 ~$*.xlsx）各算一个单位；
+- 清单文件（.txt）：每行一个源文件路径，可用“单位名称<TAB>路径”或“单位名称,路径”指定名称，
+  相对路径以清单所在目录为准，# 开头的行为注释。
+
+每个单位的“提取 -> 透视 -> 汇总 -> 复核”在进程池中并行执行，运行时间随 CPU 核数扩展，
+而不是随单位数量线性增长。mapping 在主进程中预先编译一次，子进程只需加载编译缓存。
+
+指定 --fact-store 时每个单位的提取结果写入 Parquet 事实库（源文件与 mapping 未变化时直接从事实库读取）；
+--from-store 则完全不打开源文件，一次读入事实库中所有单位的事实，在当前进程内完成透视、汇总和复核。
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.utils.logger_config import logger
+from src.legacy_runner import run_legacy_extraction
+from src.data_processor import pivot_and_clean_data, calculate_summary_values, calculate_summary_values_batch
+from src.data_validator import run_all_checks, run_all_checks_batch
+from modules.mapping_loader import load_mapping_file
+from modules.fact_store import list_entities, load_facts
+
+
+def collect_source_files(source):
+    """把目录或清单文件解析成 [(单位名称, 源文件路径), ...]，保持稳定的顺序。"""
+    entities = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(".xlsx") and not name.startswith("~$"):
+                entities.append((os.path.splitext(name)[0], os.path.join(source, name)))
+        return entities
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            sep = "\t" if "\t" in line else ("," if "," in line else None)
+            if sep:
+                entity_name, path = (part.strip() for part in line.split(sep, 1))
+            else:
+                path = line
+                entity_name = os.path.splitext(os.path.basename(path))[0]
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            entities.append((entity_name, path))
+    return entities
+
+
+def _init_worker(mapping_file):
+    """子进程初始化：预先加载 mapping（命中编译缓存），之后该进程处理的所有单位共用。"""
+    load_mapping_file(mapping_file)
+
+
+def _summarize_facts(result, raw_df, mapping_file, summary=None, checks=None) -> dict:
+    """
+    对一个单位的事实表执行透视、汇总和复核，结果填入 result。
+    summary / checks 为已批量算好的汇总指标 / 复核结果时直接使用，不再单独计算。
+    """
+    if raw_df is None or raw_df.empty:
+        result["错误"] = "数据提取失败或未提取到任何数据"
+        return result
+
+    pivoted_normal_df, pivoted_total_df = pivot_and_clean_data(raw_df)
+    if pivoted_total_df is None or pivoted_total_df.empty:
+        result["错误"] = "合计科目透视表为空"
+        return result
+
+    result["汇总指标"] = summary if summary is not None else calculate_summary_values(pivoted_total_df, raw_df)
+    if checks is None:
+        checks = run_all_checks(pivoted_normal_df, pivoted_total_df, raw_df, load_mapping_file(mapping_file))
+    result["复核结果"] = checks
+    result["状态"] = "成功"
+    return result
+
+
+def process_entity(entity_name, source_file, mapping_file, fact_store=None) -> dict:
+    """
+    处理单个单位的完整流程（在子进程中执行）。
+    返回值只包含可序列化的基本结构，失败时记录错误信息而不是抛出，避免一个单位拖垮整批。
+    """
+    result = {"单位": entity_name, "源文件": source_file, "状态": "失败", "错误": "", "汇总指标": {}, "复核结果": []}
+    try:
+        logger.info(f"=== [批量] 开始处理单位: {entity_name} ({source_file}) ===")
+        raw_df = run_legacy_extraction(source_file, mapping_file, entity=entity_name, fact_store=fact_store)
+        _summarize_facts(result, raw_df, mapping_file)
+    except Exception as e:
+        logger.error(f"单位 '{entity_name}' 处理失败: {e}")
+        result["错误"] = str(e)
+    return result
+
+
+def run_batch(entities, mapping_file, max_workers=None, fact_store=None) -> list:
+    """
+    并行处理所有单位，按输入顺序返回每个单位的结果字典。
+    max_workers=1 时在当前进程内顺序执行，便于调试。
+    """
+    if not load_mapping_file(mapping_file):
+        logger.error("因映射文件加载失败，批量流程终止。")
+        return []
+
+    total = len(entities)
+    results = [None] * total
+    if max_workers == 1:
+        for i, (entity_name, source_file) in enumerate(entities):
+            results[i] = process_entity(entity_name, source_file, mapping_file, fact_store)
+            logger.info(f"[批量] 进度 {i + 1}/{total}: {entity_name} -> {results[i]['状态']}")
+        return results
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(mapping_file,)) as executor:
+        futures = {
+            executor.submit(process_entity, entity_name, source_file, mapping_file, fact_store): i
+            for i, (entity_name, source_file) in enumerate(entities)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                entity_name, source_file = entities[i]
+                results[i] = {"单位": entity_name, "源文件": source_file, "状态": "失败", "错误": str(e), "汇总指标": {}, "复核结果": []}
+            logger.info(f"[批量] 进度 {done}/{total}: {results[i]['单位']} -> {results[i]['状态']}")
+    return results
+
+
+def run_batch_from_store(fact_store, mapping_file, entities=None) -> list:
+    """
+    直接从事实库生成各单位的汇总指标与复核结果（不读取任何源工作簿）。
+    entities 为需要处理的单位名称列表，None 表示事实库中的全部单位；按单位名称顺序返回。
+    """
+    mapping = load_mapping_file(mapping_file)
+    if not mapping:
+        logger.error("因映射文件加载失败，批量流程终止。")
+        return []
+    if not list_entities(fact_store):
+        logger.error(f"事实库 {fact_store} 中没有任何单位的数据，请先运行提取（--fact-store {fact_store}）写入事实库。")
+        return []
+
+    all_facts = load_facts(fact_store, entities=entities)
+    # 所有单位的汇总指标和复核一次向量化算出，逐单位只做透视
+    summaries = calculate_summary_values_batch(all_facts)
+    check_results = run_all_checks_batch(all_facts, mapping)
+    checks_by_entity = {
+        str(entity_name): group["复核结果"].tolist()
+        for entity_name, group in check_results.groupby("单位", sort=False)
+    }
+    results = []
+    for entity_name, facts in all_facts.groupby("单位", observed=True, sort=True):
+        result = {"单位": entity_name, "源文件": fact_store, "状态": "失败", "错误": "", "汇总指标": {}, "复核结果": []}
+        summary = summaries.loc[entity_name].to_dict() if entity_name in summaries.index else None
+        try:
+            _summarize_facts(result, facts.reset_index(drop=True), mapping_file, summary, checks_by_entity.get(entity_name))
+        except Exception as e:
+            logger.error(f"单位 '{entity_name}' 处理失败: {e}")
+            result["错误"] = str(e)
+        results.append(result)
+    logger.info(f"[批量] 已从事实库处理 {len(results)} 个单位: {fact_store}")
+    return results
+
+
+def write_consolidated_report(results, output_file):
+    """把所有单位的汇总指标和复核结果写入同一个工作簿（“汇总指标”与“复核结果”两个Sheet）。"""
+    summary_rows = [
+        {"单位": r["单位"], "源文件": r["源文件"], "状态": r["状态"], "错误": r["错误"], **r["汇总指标"]}
+        for r in results
+    ]
+    check_rows = [
+        {"单位": r["单位"], "序号": i, "是否通过": str(line).startswith("✅"), "复核结果": line}
+        for r in results
+        for i, line in enumerate(r["复核结果"], 1)
+    ]
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        pd.DataFrame(summary_rows).to_excel(writer, sheet_name="汇总指标", index=False)
+        pd.DataFrame(check_rows, columns=["单位", "序号", "是否通过", "复核结果"]).to_excel(writer, sheet_name="复核结果", index=False)
+    logger.info(f"✅ 批量汇总结果已写入: {output_file}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量生成多个单位的审计汇总指标与复核结果")
+    parser.add_argument("source", nargs="?", help="源文件目录，或每行一个源文件路径的清单文件")
+    parser.add_argument("--mapping", default=os.path.join(PROJECT_ROOT, "data", "mapping_file.xlsx"), help="所有单位共用的 mapping 文件")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数，默认等于CPU核数；1 表示顺序执行")
+    parser.add_argument("--output", default=os.path.join(PROJECT_ROOT, "output", "batch_summary.xlsx"), help="汇总输出文件")
+    parser.add_argument("--fact-store", default=None, help="Parquet 事实库目录：提取结果写入其中，输入未变化时直接读取")
+    parser.add_argument("--from-store", default=None, help="不读取源文件，直接用该事实库中的全部单位生成汇总")
+    args = parser.parse_args(argv)
+
+    if args.from_store:
+        results = run_batch_from_store(args.from_store, args.mapping)
+    else:
+        if not args.source:
+            parser.error("需要指定源文件目录或清单文件（或使用 --from-store）")
+        entities = collect_source_files(args.source)
+        if not entities:
+            logger.error(f"在 '{args.source}' 中没有找到任何源文件。")
+            return []
+        logger.info(f"[批量] 共 {len(entities)} 个单位，并行进程数: {args.workers or os.cpu_count()}")
+        results = run_batch(entities, args.mapping, max_workers=args.workers, fact_store=args.fact_store)
+    if results:
+        write_consolidated_report(results, args.output)
+        failed = [r["单位"] for r in results if r["状态"] != "成功"]
+        logger.info(f"[批量] 完成: 成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个。")
+        if failed:
+            logger.warning(f"[批量] 以下单位处理失败: {failed}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
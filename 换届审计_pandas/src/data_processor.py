@@ -2,9 +2,23 @@
 import pandas as pd
 from typing import Tuple
 from src.utils.logger_config import logger
+from modules.fact_table import select_facts
+
+def _pivot_by_year(facts: pd.DataFrame) -> pd.DataFrame:
+    """项目 x 年份 的金额透视（同一项目同一年份出现多次时取平均），轴标签还原为普通字符串。"""
+    if facts.empty:
+        return pd.DataFrame()
+    pivot = facts.pivot_table(index='项目', columns='年份', values='金额', observed=True)
+    pivot.index = pivot.index.astype(object)
+    pivot.columns = pivot.columns.astype(object)
+    return pivot
+
 
 def pivot_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    # ... 此函数保持不变，此处省略 ...
+    """
+    把事实表透视成 项目 x 年份 的两张表（普通科目、合计科目）：
+    资产负债表取“期末”，业务活动表取“本期”。
+    """
     logger.info("开始进行数据透视和清理...")
     if '科目类型' not in df.columns:
         logger.error("输入的DataFrame缺少'科目类型'列，无法进行分类处理。")
@@ -15,10 +29,8 @@ def pivot_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
         if input_df.empty:
             logger.info(f"{name}数据为空，跳过透视。")
             return pd.DataFrame()
-        bs_df = input_df[input_df['报表类型'] == '资产负债表'][['年份', '项目', '期末金额']]
-        bs_pivot = bs_df.pivot_table(index='项目', columns='年份', values='期末金额') if not bs_df.empty else pd.DataFrame()
-        is_df = input_df[input_df['报表类型'] == '业务活动表'][['年份', '项目', '本期金额']]
-        is_pivot = is_df.pivot_table(index='项目', columns='年份', values='本期金额') if not is_df.empty else pd.DataFrame()
+        bs_pivot = _pivot_by_year(select_facts(input_df, statement='资产负债表', period='期末'))
+        is_pivot = _pivot_by_year(select_facts(input_df, statement='业务活动表', period='本期'))
         final_pivot = pd.concat([bs_pivot, is_pivot], axis=0).fillna(0)
         if not final_pivot.empty:
             final_pivot = final_pivot.reindex(sorted(final_pivot.columns), axis=1)
@@ -30,10 +42,45 @@ def pivot_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     return pivoted_normal, pivoted_total
 
 
+# 资产负债类指标：(指标名, 项目, 取起始年份/终止年份, 期间)——“期初的期初，期末的期末”
+_BALANCE_METRICS = [
+    ('期初资产总额', '资产总计', 'start', '期初'),
+    ('期末资产总额', '资产总计', 'end', '期末'),
+    ('期初负债总额', '负债合计', 'start', '期初'),
+    ('期末负债总额', '负债合计', 'end', '期末'),
+    ('期初净资产总额', '净资产合计', 'start', '期初'),
+    ('期末净资产总额', '净资产合计', 'end', '期末'),
+]
+# 增减指标：(指标名, 期末指标, 期初指标)
+_CHANGE_METRICS = [
+    ('资产总额增减', '期末资产总额', '期初资产总额'),
+    ('负债总额增减', '期末负债总额', '期初负债总额'),
+    ('净资产总额增减', '期末净资产总额', '期初净资产总额'),
+]
+# 审计期间累计指标：(指标名, 合计透视表中的项目)
+_FLOW_METRICS = [
+    ('审计期间收入总额', '收入合计'),
+    ('审计期间费用总额', '费用合计'),
+]
+_BALANCE_KEY = ['项目', '年份', '期间']
+
+
+def _first_amounts(facts: pd.DataFrame, keys: list) -> pd.Series:
+    """
+    只保留资产负债类指标用到的项目，按 keys（如 项目/年份/期间）建一次索引：
+    同一键出现多次时取第一条事实，与逐条筛选后取 iloc[0] 一致。
+    """
+    items = {item for _, item, _, _ in _BALANCE_METRICS}
+    subset = facts.loc[facts['项目'].isin(items), keys + ['金额']].astype({key: object for key in keys})
+    return subset.drop_duplicates(keys).set_index(keys)['金额']
+
+
 def calculate_summary_values(pivoted_total_df: pd.DataFrame, raw_df: pd.DataFrame) -> dict:
     """
     【最终修复版】
     整合了“期初的期初，期末的期末”精确取值逻辑。
+    raw_df 为提取得到的事实表；资产负债类指标从按 (项目, 年份, 期间) 建好的索引中取值，
+    收入、费用一次从合计透视表中按项目汇总。多个单位请用 calculate_summary_values_batch。
     """
     logger.info("开始计算最终汇总指标...")
     summary = {}
@@ -55,52 +102,71 @@ def calculate_summary_values(pivoted_total_df: pd.DataFrame, raw_df: pd.DataFram
     summary['终止年份'] = end_year
     logger.info(f"数据期间为: {start_year} 年至 {end_year} 年。")
 
-    # --- vvvvvvvv 这是您新增的、现在被正确缩进到函数内部的代码块 vvvvvvvv ---
-
-    # 1. 定义一个嵌套的辅助函数，它只能在当前函数内部被调用
-    def _get_value_from_raw(item_name, year, col_name):
-        """一个专门从raw_df中精确查找单一值的辅助函数"""
-        try:
-            # 筛选出特定年份和特定项目的那一行，然后取指定列的值
-            value = raw_df[(raw_df['项目'] == item_name) & (raw_df['年份'] == year)][col_name].iloc[0]
-            return value
-        except (KeyError, IndexError):
-            logger.warning(f"在原始数据中未能找到项目'{item_name}'的{year}年'{col_name}'，将使用0代替。")
-            return 0
-
-    # 2. 使用这个辅助函数来精确获取期初和期末的值
-    summary['期初资产总额'] = _get_value_from_raw('资产总计', start_year, '期初金额')
-    summary['期末资产总额'] = _get_value_from_raw('资产总计', end_year, '期末金额')
+    amounts = _first_amounts(raw_df, _BALANCE_KEY)
+    for name, item, which, period in _BALANCE_METRICS:
+        year = start_year if which == 'start' else end_year
+        value = amounts.get((item, year, period))
+        if value is None:
+            logger.warning(f"在原始数据中未能找到项目'{item}'的{year}年'{period}金额'，将使用0代替。")
+            value = 0
+        summary[name] = value
 
-    summary['期初负债总额'] = _get_value_from_raw('负债合计', start_year, '期初金额')
-    summary['期末负债总额'] = _get_value_from_raw('负债合计', end_year, '期末金额')
-
-    summary['期初净资产总额'] = _get_value_from_raw('净资产合计', start_year, '期初金额')
-    summary['期末净资产总额'] = _get_value_from_raw('净资产合计', end_year, '期末金额')
-
-    # --- ^^^^^^^^ 新代码块结束 ^^^^^^^^ ---
-    
-    # --- 收入和费用的计算逻辑保持不变，但使用一个新的辅助函数 ---
-    def _get_value_from_pivoted(item_name, year_or_years):
-        """专门从合计透视表中取值的辅助函数"""
-        try:
-            if isinstance(year_or_years, list):
-                return pivoted_total_df.loc[item_name, year_or_years].sum()
-            else:
-                return pivoted_total_df.loc[item_name, year_or_years]
-        except KeyError:
-            logger.warning(f"在合计透视表中未能找到项目'{item_name}'的数据，将使用0代替。")
-            return 0
-
-    summary['资产总额增减'] = summary['期末资产总额'] - summary['期初资产总额']
-    summary['负债总额增减'] = summary['期末负债总额'] - summary['期初负债总额']
-    summary['净资产总额增减'] = summary['期末净资产总额'] - summary['期初净资产总额']
+    for name, end_name, start_name in _CHANGE_METRICS:
+        summary[name] = summary[end_name] - summary[start_name]
     logger.info("资产、负债、净资产指标计算完成。")
 
-    summary['审计期间收入总额'] = _get_value_from_pivoted('收入合计', years)
-    summary['审计期间费用总额'] = _get_value_from_pivoted('费用合计', years)
+    flow_items = [item for _, item in _FLOW_METRICS]
+    flow_rows = pivoted_total_df.loc[pivoted_total_df.index.isin(flow_items), years]
+    flow_totals = flow_rows.groupby(level=0).sum().sum(axis=1)
+    for name, item in _FLOW_METRICS:
+        if item in flow_totals.index:
+            summary[name] = flow_totals[item]
+        else:
+            logger.warning(f"在合计透视表中未能找到项目'{item}'的数据，将使用0代替。")
+            summary[name] = 0
     summary['审计期间净结余'] = summary['审计期间收入总额'] - summary['审计期间费用总额']
     logger.info("收入、费用、结余指标计算完成。")
     
     logger.info("所有汇总指标计算完成。")
-    return summary
\ No newline at end of file
+    return summary
+
+
+def calculate_summary_values_batch(facts: pd.DataFrame) -> pd.DataFrame:
+    """
+    一次计算多个单位的汇总指标：facts 为带'单位'列的事实表（例如事实库中全部单位的事实）。
+    返回以单位为索引的 DataFrame，每个单位一行，列与 calculate_summary_values 返回的键一致、取值相同；
+    合计科目透视表为空（没有年份）的单位不出现在结果中，缺失的指标按0计。
+    """
+    totals = facts[facts['科目类型'] == '合计']
+    # 与 pivot_and_clean_data 的合计透视取同样的事实：资产负债表取期末，业务活动表取本期
+    pivot_facts = pd.concat([
+        select_facts(totals, statement='资产负债表', period='期末'),
+        select_facts(totals, statement='业务活动表', period='本期'),
+    ]).astype({'单位': object, '报表类型': object, '项目': object, '年份': object})
+    pivot_facts = pivot_facts[pivot_facts['年份'].astype(str).str.isdigit()]
+
+    span = pivot_facts.groupby('单位')['年份'].agg(['min', 'max'])
+    if span.empty:
+        return pd.DataFrame()
+    result = pd.DataFrame({'起始年份': span['min'], '终止年份': span['max']})
+
+    amounts = _first_amounts(facts, ['单位'] + _BALANCE_KEY)
+    for name, item, which, period in _BALANCE_METRICS:
+        year_col = '起始年份' if which == 'start' else '终止年份'
+        keys = pd.MultiIndex.from_arrays(
+            [result.index, [item] * len(result), result[year_col], [period] * len(result)]
+        )
+        result[name] = amounts.reindex(keys).fillna(0).to_numpy()
+
+    for name, end_name, start_name in _CHANGE_METRICS:
+        result[name] = result[end_name] - result[start_name]
+
+    # 透视表中同一项目同一年份取平均，再按单位、项目累加所有年份
+    flow_facts = pivot_facts[pivot_facts['项目'].isin([item for _, item in _FLOW_METRICS])]
+    yearly = flow_facts.groupby(['单位', '报表类型', '项目', '年份'])['金额'].mean()
+    flow_totals = yearly.groupby(level=['单位', '项目']).sum().unstack('项目')
+    for name, item in _FLOW_METRICS:
+        column = flow_totals[item] if item in flow_totals.columns else pd.Series(dtype='float64')
+        result[name] = column.reindex(result.index).fillna(0)
+    result['审计期间净结余'] = result['审计期间收入总额'] - result['审计期间费用总额']
+    return result
@@ -3,97 +3,165 @@ import re
 import sys
 import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl import load_workbook
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
 from src.utils.logger_config import logger
+from modules.sheet_grid import SheetGrid
+from modules.fact_table import FactTableBuilder
+from modules.fact_store import fact_store_key, has_facts, load_facts, write_facts
 from modules.mapping_loader import load_mapping_file
 from modules.balance_sheet_processor import process_balance_sheet
 from modules.income_statement_processor import process_income_statement
 
-def run_legacy_extraction(source_path, mapping_path):
+def _classify_sheets(wb_src):
+    """
+    按年份归类可见的报表Sheet，返回 (资产负债表列表, 业务活动表列表, {年份: ([资产负债表], [业务活动表])})。
+    两个列表都保持工作簿中的原始顺序，用于最后按原顺序拼装记录。
+    """
+    balance_sheets, activity_sheets, by_year = [], [], {}
+    for original_sheet_name in wb_src.sheetnames:
+        if wb_src[original_sheet_name].sheet_state == 'hidden': continue
+        sheet_name = original_sheet_name.strip()
+
+        # --- 核心修复：分步判断逻辑 ---
+        match = re.search(r'(\d{4})', sheet_name)
+        if not match:
+            continue
+        year = match.group(1)
+        # 判断是否为资产负债表
+        if "资产负债表" in sheet_name or sheet_name.lower().endswith('z'):
+            balance_sheets.append(original_sheet_name)
+            by_year.setdefault(year, ([], []))[0].append(original_sheet_name)
+        # 判断是否为业务活动表
+        if "业务活动表" in sheet_name or sheet_name.lower().endswith('y'):
+            activity_sheets.append(original_sheet_name)
+            by_year.setdefault(year, ([], []))[1].append(original_sheet_name)
+    return balance_sheets, activity_sheets, by_year
+
+
+def _extract_year(grids, balance_names, activity_names, mapping):
+    """
+    处理同一年度的全部Sheet：先资产负债表，再用其净资产作为业务活动表的计算保底。
+    年度之间没有依赖，因此各年度可以独立（并行）执行。
+    返回 {(报表类型, 原始Sheet名): FactTableBuilder}。
+    """
+    blocks_df = mapping.get("blocks_df")
+    alias_map_df = mapping.get("alias_map_df")
+    alias_resolver = mapping.get("alias_resolver")
+    yewu_line_map = mapping.get("yewu_line_map")
+
+    facts_by_sheet = {}
+    net_asset_fallback = None
+    for original_sheet_name in balance_names:
+        balance_facts = process_balance_sheet(grids[original_sheet_name], original_sheet_name.strip(), blocks_df, alias_resolver)
+        facts_by_sheet[("资产负债表", original_sheet_name)] = balance_facts
+        if len(balance_facts):
+            net_asset_fallback = {
+                "期初净资产": balance_facts.amount_total('净资产合计', '期初'),
+                "期末净资产": balance_facts.amount_total('净资产合计', '期末'),
+            }
+
+    for original_sheet_name in activity_names:
+        facts_by_sheet[("业务活动表", original_sheet_name)] = process_income_statement(
+            grids[original_sheet_name], original_sheet_name.strip(), yewu_line_map, alias_map_df, net_asset_fallback
+        )
+    return facts_by_sheet
+
+
+def _extract_year_worker(source_path, mapping_path, balance_names, activity_names):
+    """并行模式下的子进程任务：以只读方式自行打开源文件，只读取本年度需要的Sheet。"""
+    mapping = load_mapping_file(mapping_path)
+    wb_src = load_workbook(source_path, read_only=True, data_only=True)
+    try:
+        grids = {name: SheetGrid.from_worksheet(wb_src[name]) for name in dict.fromkeys(balance_names + activity_names)}
+    finally:
+        wb_src.close()
+    return _extract_year(grids, balance_names, activity_names, mapping)
+
+
+def run_legacy_extraction(source_path, mapping_path, parallel=False, max_workers=None, entity=None, fact_store=None):
     """
     【最终修复版 V4 - 总指挥官】
     修复了AttributeError，采用分步判断逻辑，确保健壮性。
+
+    parallel=True 时按年度并行提取：每个年度一个子进程，各自以只读方式打开源文件，
+    年度内仍先处理资产负债表再处理业务活动表（净资产保底只依赖同一年度）。
+    结果按原来的顺序拼装（先全部资产负债表，再全部业务活动表），与串行模式一致。
+
+    返回长格式事实表（见 modules.fact_table），entity 为“单位”列的值，默认取源文件名。
+    fact_store 为事实库目录时：源文件和 mapping 都未变化就直接从 Parquet 读取，否则提取后写入事实库
+    （需要 pyarrow，未安装时给出警告并按普通方式提取）。
     """
+    if entity is None:
+        entity = os.path.splitext(os.path.basename(source_path))[0]
+    if fact_store is not None:
+        try:
+            key = fact_store_key(source_path, mapping_path)
+            if has_facts(fact_store, entity, key):
+                logger.info(f"⚡ 源文件与映射文件未变化，从事实库加载单位 '{entity}' 的事实: {fact_store}")
+                return load_facts(fact_store, entities=[entity], key=key)
+        except ImportError as e:
+            logger.warning(f"⚠️ {e}，本次不使用事实库。")
+            fact_store = None
+        except FileNotFoundError:
+            # 源文件不存在时交给下面的提取流程按原来的方式报错
+            fact_store = None
+
     logger.info("--- 开始执行【最终修复版 V4】数据提取流程 ---")
     
     mapping = load_mapping_file(mapping_path)
     if not mapping:
         logger.error("因映射文件加载失败，数据提取流程终止。")
         return None
-        
-    blocks_df = mapping.get("blocks_df")
-    alias_map_df = mapping.get("alias_map_df")
-    yewu_line_map = mapping.get("yewu_line_map")
 
     try:
-        wb_src = load_workbook(source_path, data_only=True)
+        # 只读模式流式加载，每个Sheet只读取一次数值快照
+        wb_src = load_workbook(source_path, read_only=True, data_only=True)
     except FileNotFoundError:
         logger.error(f"源数据文件未找到: {source_path}")
         return None
 
-    all_records = []
-    processed_balance_sheets = {} 
+    balance_sheets, activity_sheets, by_year = _classify_sheets(wb_src)
+    facts_by_sheet = {}
 
-    # --- 第一遍循环：只处理资产负债表 ---
-    logger.info("--- [Pass 1/2] 正在处理所有资产负债表... ---")
-    for original_sheet_name in wb_src.sheetnames:
-        ws_src = wb_src[original_sheet_name]
-        sheet_name = original_sheet_name.strip()
+    if parallel and len(by_year) > 1:
+        wb_src.close()
+        logger.info(f"--- 按年度并行提取 {len(by_year)} 个年度的报表... ---")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_extract_year_worker, source_path, mapping_path, balance_names, activity_names)
+                for balance_names, activity_names in by_year.values()
+            ]
+            for future in futures:
+                facts_by_sheet.update(future.result())
+    else:
+        grids = {name: SheetGrid.from_worksheet(wb_src[name]) for name in dict.fromkeys(balance_sheets + activity_sheets)}
+        wb_src.close()
+        logger.info("--- 逐年度处理资产负债表及业务活动表... ---")
+        for balance_names, activity_names in by_year.values():
+            facts_by_sheet.update(_extract_year(grids, balance_names, activity_names, mapping))
 
-        if ws_src.sheet_state == 'hidden': continue
+    # 按原顺序拼装：先全部资产负债表，再全部业务活动表
+    all_facts = FactTableBuilder()
+    for original_sheet_name in balance_sheets:
+        all_facts.extend(facts_by_sheet.get(("资产负债表", original_sheet_name)) or FactTableBuilder())
+    for original_sheet_name in activity_sheets:
+        all_facts.extend(facts_by_sheet.get(("业务活动表", original_sheet_name)) or FactTableBuilder())
 
-        # --- 核心修复：分步判断逻辑 ---
-        match = re.search(r'(\d{4})', sheet_name)
-        if match:
-            year = match.group(1)
-            # 判断是否为资产负债表
-            if "资产负债表" in sheet_name or sheet_name.lower().endswith('z'):
-                balance_sheet_records = process_balance_sheet(ws_src, sheet_name, blocks_df, alias_map_df)
-                if balance_sheet_records:
-                    all_records.extend(balance_sheet_records)
-                    df_temp = pd.DataFrame(balance_sheet_records)
-                    
-                    # 增加健壮性检查，确保'项目'列存在
-                    if '项目' in df_temp.columns:
-                        processed_balance_sheets[year] = {
-                            "期初净资产": pd.to_numeric(df_temp.loc[df_temp['项目'] == '净资产合计', '期初金额'].sum(), errors='coerce'),
-                            "期末净资产": pd.to_numeric(df_temp.loc[df_temp['项目'] == '净资产合计', '期末金额'].sum(), errors='coerce')
-                        }
-
-    # --- 第二遍循环：只处理业务活动表 ---
-    logger.info("--- [Pass 2/2] 正在处理所有业务活动表... ---")
-    for original_sheet_name in wb_src.sheetnames:
-        ws_src = wb_src[original_sheet_name]
-        sheet_name = original_sheet_name.strip()
-
-        if ws_src.sheet_state == 'hidden': continue
-        
-        match = re.search(r'(\d{4})', sheet_name)
-        if match:
-            year = match.group(1)
-            # 判断是否为业务活动表
-            if "业务活动表" in sheet_name or sheet_name.lower().endswith('y'):
-                net_asset_fallback = processed_balance_sheets.get(year)
-                income_statement_records = process_income_statement(
-                    ws_src, sheet_name, yewu_line_map, alias_map_df, net_asset_fallback
-                )
-                if income_statement_records:
-                    all_records.extend(income_statement_records)
-
-    if not all_records:
+    if not len(all_facts):
         logger.error("未能从源文件中提取到任何有效数据记录。")
         return pd.DataFrame()
 
-    final_df = pd.DataFrame(all_records)
-
-    amount_cols = ['期初金额', '期末金额', '本期金额', '上期金额']
-    for col in amount_cols:
-        if col in final_df.columns:
-            final_df[col] = pd.to_numeric(final_df[col], errors='coerce').fillna(0)
+    final_df = all_facts.to_frame(entity)
 
-    logger.info(f"--- 数据提取流程结束，成功生成包含 {len(final_df)} 条记录的DataFrame。---")
+    logger.info(f"--- 数据提取流程结束，成功生成包含 {len(final_df)} 条事实的事实表。---")
+    if fact_store is not None:
+        try:
+            write_facts(fact_store, final_df, key)
+        except Exception as e:
+            logger.warning(f"⚠️ 事实库写入失败（不影响本次运行）: {e}")
     return final_df
\ No newline at end of file
@@ -1,6 +1,7 @@
 # /src/utils/logger_config.py
 
 import logging
+import multiprocessing
 import os
 
 def setup_logger():
@@ -24,7 +25,9 @@ def setup_logger():
 
     # 2. 创建一个用于输出到文件的Handler
     # 这个handler会将所有DEBUG及以上级别的日志都写入文件
-    file_handler = logging.FileHandler(log_filepath, mode='w', encoding='utf-8')
+    # 批量模式下的子进程会重新导入本模块，此时改为追加写入，避免清空主进程的日志
+    file_mode = 'a' if multiprocessing.parent_process() is not None else 'w'
+    file_handler = logging.FileHandler(log_filepath, mode=file_mode, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(module)s.%(funcName)s:%(lineno)d - %(message)s"
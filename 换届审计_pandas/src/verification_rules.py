@@ -0,0 +1,271 @@
+# /src/verification_rules.py
+"""
+声明式复核规则引擎。
+
+复核规则在 mapping_file.xlsx 的可选Sheet“复核规则”中声明，每行一条：
+    规则名称 | 规则类型 | 左项 | 右项 | 分组 | 容差
+  - 规则类型：
+      年度平衡  每个年度 左项 = 右项（例如 资产总计 = 负债合计+净资产合计）
+      跨期联动  左项的期末年减期初年之差 = 右项在所有年度的累计（例如 净资产合计 = 收入合计-费用合计）
+      分项合计  每个年度 左项（合计科目）= 右项各分项（普通科目）之和
+  - 左项 / 右项：合计透视表中的项目，可用 + / - 组合；分项合计的右项用 + 或逗号分隔分项。
+  - 分组：同组规则共用一次缺项检查，组内任一项目缺失时整组跳过并只报告一次（默认为规则名称）。
+  - 容差：差异绝对值小于容差视为平衡，默认 0.01。
+没有“复核规则”Sheet时使用内置的 DEFAULT_RULES；mapping 中的 yewu_subtotal_config 仍会生成分项合计规则。
+
+每条规则对所有单位、所有年度作为一个整体的数组表达式求值（规则数 x 项目数次向量运算，
+与单位数、年度数无关），结果是结构化的 DataFrame；提示文字只在最后由 format_results 统一生成。
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logger_config import logger
+
+DEFAULT_TOLERANCE = 0.01
+
+DEFAULT_RULES = [
+    {"规则名称": "资产负债表内部", "规则类型": "年度平衡", "左项": "资产总计", "右项": "负债合计+净资产合计", "分组": "核心勾稽关系"},
+    {"规则名称": "跨期核心勾稽关系", "规则类型": "跨期联动", "左项": "净资产合计", "右项": "收入合计-费用合计", "分组": "核心勾稽关系"},
+]
+
+RULE_TYPES = ("年度平衡", "跨期联动", "分项合计")
+RESULT_COLUMNS = ["单位", "规则序号", "规则名称", "规则类型", "分组", "左项", "年份", "左值", "右值", "差异", "通过", "缺少项目"]
+
+_TERM_SPLIT = re.compile(r"\s*([+\-＋－])\s*")
+_SUBTOTAL_TYPE_TO_TOTAL = {'收入': '收入合计', '费用': '费用合计'}
+
+
+def parse_terms(expression) -> list:
+    """把 '负债合计+净资产合计' 解析成 [(1, '负债合计'), (1, '净资产合计')]；逗号视为 +。"""
+    text = str(expression or "").replace(",", "+").replace("，", "+").strip()
+    terms, sign = [], 1
+    for part in _TERM_SPLIT.split(text):
+        if part in ("+", "＋"):
+            sign = 1
+        elif part in ("-", "－"):
+            sign = -1
+        elif part:
+            terms.append((sign, part))
+            sign = 1
+    return terms
+
+
+def _terms(value) -> list:
+    """已解析的 [(系数, 项目), ...] 原样使用，表达式文本交给 parse_terms 解析。"""
+    if isinstance(value, (list, tuple)):
+        return [(sign, item) for sign, item in value]
+    return parse_terms(value)
+
+
+def _normalize_rule(raw: dict) -> dict:
+    rule_type = str(raw.get("规则类型", "")).strip()
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"未知的规则类型 '{rule_type}'（可选: {', '.join(RULE_TYPES)}）")
+    name = str(raw.get("规则名称", "")).strip()
+    group = raw.get("分组")
+    tolerance = raw.get("容差")
+    return {
+        "规则名称": name,
+        "规则类型": rule_type,
+        "左项": _terms(raw.get("左项")),
+        "右项": _terms(raw.get("右项")),
+        "分组": str(group).strip() if group is not None and not pd.isna(group) and str(group).strip() else name,
+        "容差": float(tolerance) if tolerance is not None and not pd.isna(tolerance) else DEFAULT_TOLERANCE,
+    }
+
+
+def build_rules(mapping) -> list:
+    """
+    规则列表：先是 yewu_subtotal_config 生成的分项合计规则，
+    再是 mapping 中“复核规则”Sheet 声明的规则（没有时使用 DEFAULT_RULES）。
+    """
+    rules = []
+    for config_type, sub_items in (mapping.get("yewu_subtotal_config") or {}).items():
+        total_name = _SUBTOTAL_TYPE_TO_TOTAL.get(config_type)
+        if total_name:
+            # 分项名称直接作为项目，不经过表达式解析（名称中可能含 + - 或逗号）；重复列出的分项只计一次
+            rules.append(_normalize_rule({"规则名称": f"{total_name}内部分项", "规则类型": "分项合计",
+                                          "左项": [(1, total_name)],
+                                          "右项": [(1, item) for item in dict.fromkeys(sub_items)]}))
+    declared = mapping.get("verification_rules")
+    for raw in (declared if declared else DEFAULT_RULES):
+        rules.append(_normalize_rule(raw))
+    return rules
+
+
+def _entity_frame(df: pd.DataFrame, entity="") -> pd.DataFrame:
+    """单个单位的 项目 x 年份 透视表 -> (单位, 项目) x 年份，只保留年份列。"""
+    years = sorted(col for col in df.columns if str(col).isdigit())
+    return pd.concat({entity: df[years]}, names=["单位", "项目"])
+
+
+def _combine(wide: pd.DataFrame, terms, entities) -> pd.DataFrame:
+    """按 (系数, 项目) 组合出 单位 x 年份 的数组；同一单位同一项目有多行时先相加，缺失的项目按0计。"""
+    result = pd.DataFrame(0.0, index=entities, columns=wide.columns)
+    items = wide.index.get_level_values("项目")
+    for sign, item in terms:
+        rows = wide[items == item]
+        if rows.empty:
+            continue
+        values = rows.groupby(level="单位", sort=False).sum().reindex(entities, fill_value=0.0)
+        result = result + sign * values
+    return result
+
+
+def _missing_items(present: pd.DataFrame, items, entities) -> pd.Series:
+    """每个单位缺少的项目列表（按 items 的顺序）。"""
+    missing = pd.Series([[] for _ in entities], index=entities, dtype=object)
+    for item in items:
+        has_item = present[item] if item in present.columns else pd.Series(False, index=entities)
+        for entity in has_item.index[~has_item.reindex(entities, fill_value=False).to_numpy()]:
+            missing[entity].append(item)
+    return missing
+
+
+def evaluate_rules(normal_df: pd.DataFrame, total_df: pd.DataFrame, rules: list, year_mask: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    对所有单位、所有年度求值全部规则。
+    normal_df / total_df：(单位, 项目) x 年份 的普通科目 / 合计科目透视表；
+    year_mask：单位 x 年份 的布尔表，标记各单位实际有数据的年度（None 表示全部年度）。
+    返回 RESULT_COLUMNS 结构的结果表，每个 (单位, 规则, 年度) 一行；缺项时该单位该组只有一行，缺少项目非空。
+    """
+    years = list(total_df.columns)
+    entities = total_df.index.get_level_values("单位").unique()
+    if year_mask is None:
+        year_mask = pd.DataFrame(True, index=entities, columns=years)
+    year_mask = year_mask.reindex(index=entities, columns=years, fill_value=False)
+    present = pd.Series(True, index=total_df.index[~total_df.index.duplicated()]).unstack("项目", fill_value=False)
+
+    frames = []
+    group_missing = {}
+    reported_groups = set()
+    for order, rule in enumerate(rules):
+        rule_type, left_terms, right_terms = rule["规则类型"], rule["左项"], rule["右项"]
+
+        # 缺项检查：分项合计只要求合计项存在，其余规则要求整组的所有项目存在
+        if rule_type == "分项合计":
+            missing = _missing_items(present, [item for _, item in left_terms], entities)
+            report_missing = True
+        else:
+            group = rule["分组"]
+            if group not in group_missing:
+                group_items = list(dict.fromkeys(
+                    item for r in rules if r["规则类型"] != "分项合计" and r["分组"] == group
+                    for _, item in r["左项"] + r["右项"]
+                ))
+                group_missing[group] = _missing_items(present, group_items, entities)
+            missing = group_missing[group]
+            report_missing = group not in reported_groups
+            reported_groups.add(group)
+
+        has_missing = missing.map(bool)
+        ok_entities = entities[~has_missing.to_numpy()]
+        base = {"规则序号": order, "规则名称": rule["规则名称"], "规则类型": rule_type, "分组": rule["分组"],
+                "左项": "+".join(item for _, item in left_terms)}
+
+        if report_missing and has_missing.any():
+            bad = missing[has_missing]
+            frames.append(pd.DataFrame({**base, "单位": bad.index, "年份": None, "左值": np.nan, "右值": np.nan,
+                                        "差异": np.nan, "通过": False, "缺少项目": bad.to_numpy()}))
+        if len(ok_entities) == 0:
+            continue
+
+        left = _combine(total_df, left_terms, ok_entities)
+        if rule_type == "分项合计":
+            right = _combine(normal_df.reindex(columns=years, fill_value=0.0), right_terms, ok_entities)
+        else:
+            right = _combine(total_df, right_terms, ok_entities)
+        mask = year_mask.loc[ok_entities]
+
+        if rule_type == "跨期联动":
+            # 各单位自己的起止年度：期末年减期初年，右项在单位的所有年度上累计
+            mask_values = mask.to_numpy()
+            first = mask_values.argmax(axis=1)
+            last = mask_values.shape[1] - 1 - mask_values[:, ::-1].argmax(axis=1)
+            rows = np.arange(len(ok_entities))
+            left_values = left.to_numpy()[rows, last] - left.to_numpy()[rows, first]
+            right_values = right.where(mask, 0.0).sum(axis=1).to_numpy()
+            frame = pd.DataFrame({**base, "单位": ok_entities, "年份": None, "左值": left_values, "右值": right_values})
+        else:
+            long_left = left.where(mask).stack()
+            long_right = right.where(mask).stack().reindex(long_left.index)
+            frame = pd.DataFrame({**base, "单位": long_left.index.get_level_values(0),
+                                  "年份": long_left.index.get_level_values(1),
+                                  "左值": long_left.to_numpy(), "右值": long_right.to_numpy()})
+        # 分项合计的差异是“分项计算值 - 报表合计”，其余为“左 - 右”
+        diff = frame["右值"] - frame["左值"] if rule_type == "分项合计" else frame["左值"] - frame["右值"]
+        frame["差异"] = diff
+        frame["通过"] = diff.abs() < rule["容差"]
+        frame["缺少项目"] = None
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    results = pd.concat(frames, ignore_index=True)[RESULT_COLUMNS]
+    # 输出顺序：单位 -> 规则 -> 年度（缺项提示排在该规则的年度结果之前）
+    results["_缺项"] = results["缺少项目"].notna()
+    results = results.sort_values(["单位", "规则序号", "_缺项", "年份"], ascending=[True, True, False, True],
+                                  kind="stable", na_position="first")
+    return results.drop(columns="_缺项").reset_index(drop=True)
+
+
+def _format_row(row) -> str:
+    rule_type, name, year = row["规则类型"], row["规则名称"], row["年份"]
+    if row["缺少项目"] is not None:
+        if rule_type == "分项合计":
+            return f"❌ 复核失败: 关键合计项 '{row['左项']}' 未能成功提取。"
+        return f"❌ {row['分组']}检查失败: 缺少关键合计项 {row['缺少项目']}"
+    diff = row["差异"]
+    if rule_type == "分项合计":
+        calculated, reported = row["右值"], row["左值"]
+        if row["通过"]:
+            return f"✅ {year}年'{row['左项']}'内部分项核对平衡 (计算值 {calculated:,.2f})"
+        return f"❌ {year}年'{row['左项']}'内部分项核对**不平**: 计算值 {calculated:,.2f} vs 报表值 {reported:,.2f} (差异: {diff:,.2f})"
+    prefix = f"{year}年{name}" if rule_type == "年度平衡" else name
+    if row["通过"]:
+        return f"✅ {prefix}平衡"
+    return f"❌ {prefix}**不平** (差异: {diff:,.2f})"
+
+
+def format_results(results: pd.DataFrame) -> list:
+    """把结果表按行顺序格式化为提示文字列表。"""
+    return [_format_row(row) for row in results.to_dict("records")]
+
+
+def check_entity(pivoted_normal_df, pivoted_total_df, mapping, entity="") -> pd.DataFrame:
+    """单个单位（项目 x 年份 透视表）的规则求值。"""
+    rules = build_rules(mapping)
+    normal = _entity_frame(pivoted_normal_df, entity) if not pivoted_normal_df.empty else pd.DataFrame()
+    total = _entity_frame(pivoted_total_df, entity)
+    if normal.empty:
+        normal = pd.DataFrame(columns=total.columns, index=pd.MultiIndex.from_arrays([[], []], names=["单位", "项目"]))
+    logger.info(f"  -> 正在执行 {len(rules)} 条复核规则...")
+    return evaluate_rules(normal, total, rules)
+
+
+def check_facts(facts: pd.DataFrame, mapping) -> pd.DataFrame:
+    """
+    多个单位的事实表一次求值全部规则：按 (单位, 项目) x 年份 透视（资产负债表取期末，业务活动表取本期，
+    同一项目同一年份取平均），各单位只在自己有数据的年度上求值。
+    """
+    rules = build_rules(mapping)
+    pivot_facts = pd.concat([
+        facts[(facts["报表类型"] == "资产负债表") & (facts["期间"] == "期末")],
+        facts[(facts["报表类型"] == "业务活动表") & (facts["期间"] == "本期")],
+    ]).astype({"单位": object, "报表类型": object, "项目": object, "年份": object, "科目类型": object})
+    pivot_facts = pivot_facts[pivot_facts["年份"].astype(str).str.isdigit()]
+
+    def _wide(item_type):
+        subset = pivot_facts[pivot_facts["科目类型"] == item_type]
+        if subset.empty:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=["单位", "项目"]))
+        return subset.groupby(["单位", "报表类型", "项目", "年份"], observed=True)["金额"].mean().unstack("年份").droplevel("报表类型")
+
+    total = _wide("合计")
+    normal = _wide("普通")
+    years = sorted(total.columns)
+    total = total.reindex(columns=years)
+    year_mask = total.notna().groupby(level="单位").any()
+    return evaluate_rules(normal.reindex(columns=years).fillna(0.0), total.fillna(0.0), rules, year_mask)